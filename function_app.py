@@ -1,15 +1,19 @@
 """HTTP trigger function to query CosmosDB database."""
 
 # imports
+import asyncio
 import logging
 
 # 3rd party imports
 import azure.functions as func
+import cachetools
 
 # local imports
 from modules.query_cosmosdb import query_cosmosdb
 from modules.download_blob import download_blob
-from utilities import exception_handler, setup, parse_xsl
+from modules.download_blob.modules import download_xml
+from utilities import compression, exception_handler, setup, parse_xsl
+from utilities.locked_cache import LockedCache
 
 # # setup logging
 log: logging.Logger = logging.getLogger(name="log." + __name__)
@@ -19,13 +23,51 @@ xlst_transformer = parse_xsl.transform_styl_xls_to_XLST(
     xsl_path="ksef_documents/styl.xsl"
 )
 
+blob_container_client = download_xml.create_blob_container_client(
+    conn_str=setup.BLOB_SERVICE_CONNECTION_STRING,
+    container=setup.BLOB_CONTAINER_NAME,
+)
+
+# caches are bounded by bytes of cached bodies (setup.CACHE_MAX_BYTES each), not by number of entries
+xml_cache = (
+    LockedCache(
+        cache=cachetools.TTLCache(
+            maxsize=setup.CACHE_MAX_BYTES, ttl=setup.XML_CACHE_TTL, getsizeof=len
+        )
+    )
+    if setup.XML_CACHE_TTL > 0
+    else None
+)
+
+pdf_cache = LockedCache(
+    cache=cachetools.LRUCache(maxsize=setup.CACHE_MAX_BYTES, getsizeof=len)
+)
+
+# outlives xml_cache entries: expired invoices are revalidated by ETag instead of downloaded again;
+# entries are (etag, invoice) tuples, sized by the invoice
+etag_cache = LockedCache(
+    cache=cachetools.LRUCache(
+        maxsize=setup.CACHE_MAX_BYTES, getsizeof=lambda entry: len(entry[1])
+    )
+)
+
+query_cache = (
+    LockedCache(
+        cache=cachetools.TTLCache(
+            maxsize=setup.CACHE_MAX_BYTES, ttl=setup.QUERY_CACHE_TTL, getsizeof=len
+        )
+    )
+    if setup.QUERY_CACHE_TTL > 0
+    else None
+)
+
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
 
 @app.function_name(name="download_BLOB")
 @app.route(route="downloadblob", methods=["POST", "GET"])
-def downloadblob_app(
+async def downloadblob_app(
     req: func.HttpRequest,
 ) -> func.HttpResponse:
     """
@@ -39,19 +81,25 @@ def downloadblob_app(
     """
     log.info(msg="download_BLOB received a request.")
 
-    headers: dict[str, str] = {"Content-Type": "application/xml"}
-
-    body, status_code = download_blob.main(
+    # download and pdf rendering are blocking; running them in a thread keeps the event loop free,
+    # so that concurrent invocations on the worker overlap
+    body, status_code = await asyncio.to_thread(
+        download_blob.main,
         req=req,
-        blob_connection_string=setup.BLOB_SERVICE_CONNECTION_STRING,
-        blob_container_name=setup.BLOB_CONTAINER_NAME,
+        blob_container_client=blob_container_client,
         exception_handler=exception_handler.handle_cosmosdb_error,
         xslt_transformer=xlst_transformer,
+        xml_cache=xml_cache,
+        pdf_cache=pdf_cache,
+        etag_cache=etag_cache,
     )
 
-    log.info(
-        msg=f"download_BLOB returned HTTP response with status code {status_code}."
-    )
+    # header follows what was actually returned: file (xml, pdf, zip) or JSON error details
+    headers: dict[str, str] = {
+        "Content-Type": download_blob.get_content_type(req=req, status_code=status_code)
+    }
+
+    log.info("download_BLOB returned HTTP response with status code %s.", status_code)
     return func.HttpResponse(
         body=body,
         headers=headers,
@@ -61,7 +109,7 @@ def downloadblob_app(
 
 @app.function_name(name="query_cosmosDB")
 @app.route(route="querycosmosdb", methods=["POST"])
-def querycosmosdb_app(
+async def querycosmosdb_app(
     req: func.HttpRequest,
 ) -> func.HttpResponse:
     """
@@ -107,30 +155,45 @@ def querycosmosdb_app(
             }
         Query's result is returned in response's body in json format, with status code 200.
 
+        Optional paging: with page_size query parameter (1-1000) only a single page of query items is returned,\
+        as {"items": {...}, "continuation": token}. To get the next page, send the same query with the token in\
+        x-continuation header (or continuation query parameter). continuation is null on the last page.
+
         In case of error, response's body contains error details and status code fitting the error.
 
     WARNING:
         Do not change the name of "id" column in SQL query ("SELECT c.id as 'not_id' FROM c" is not allowed)\
-        as it is used to build the dictionary of query items in function query_cosmosDB.list_to_dict().
+        as it is used to build the dictionary of query items in function get_query_items.iterable_to_json().
     """
     # if try/except block fails to handle exception, default HTTP response is returned
     log.info(msg="Query_CosmosDB received a request.")
 
     headers: dict[str, str] = {"Content-Type": "application/json"}
 
-    body, status_code = query_cosmosdb.main(
+    # CosmosDB query and its pages are fetched in a thread, so that concurrent invocations on the worker overlap
+    body, status_code = await asyncio.to_thread(
+        query_cosmosdb.main,
         req=req,
         cosmosdb_connection_string=setup.COSMOSDB_CONNECTION_STRING,
         cosmosdb_database_id=setup.COSMOSDB_DATABASE_ID,
         cosmosdb_container_id=setup.COSMOSDB_CONTAINER_ID,
         exception_handler=exception_handler.handle_cosmosdb_error,
+        cosmosdb_partition_key_path=setup.COSMOSDB_PARTITION_KEY,
+        cosmosdb_consistency_level=setup.COSMOSDB_CONSISTENCY_LEVEL,
+        query_cache=query_cache,
+        max_cache_staleness_ms=(
+            setup.QUERY_CACHE_TTL * 1000 if setup.QUERY_CACHE_TTL > 0 else None
+        ),
     )
 
-    log.info(
-        msg=f"Query_CosmosDB returned HTTP response with status code {status_code}."
+    # compression of large results is CPU-bound as well, so it is kept off the event loop
+    body = await asyncio.to_thread(
+        compression.gzip_body, req=req, body=body, headers=headers
     )
+
+    log.info("Query_CosmosDB returned HTTP response with status code %s.", status_code)
     return func.HttpResponse(
-        body=str(body),
+        body=body,
         headers=headers,
         status_code=status_code,
     )
@@ -1,69 +1,176 @@
 """Facilitates process of downloading xml file from BLOB storage."""
+
 import http.client as http_client
 import logging
-import sys
-from typing import Callable
+from typing import Callable, MutableMapping, Optional
 
 import azure.functions as func
+from azure.storage.blob import ContainerClient
 from lxml import etree
+import orjson
 
 
-from .modules import read_params, download_xml, create_pdf
+from .modules import read_params, download_xml, create_pdf, create_zip
 from .modules.custom_error import DownloadBlobError
 
 log = logging.getLogger(name="log." + __name__)
 
 
+def get_content_type(req: func.HttpRequest, status_code: int) -> str:
+    """
+    Returns Content-Type of the body returned by main() for the request. Error bodies (exception handler's and\
+    unhandled exception's) are JSON; on success, parameters were already validated by read_params.
+
+    Args:
+        req (func.HttpRequest): HTTP request sent to Azure Function's endpoint.
+        status_code (int): status code returned by main().
+
+    Returns:
+        str: "application/zip" for batch download, "application/pdf" or "application/xml" for a single invoice,\
+            "application/json" for error details.
+    """
+    if status_code != http_client.OK:
+        return "application/json"
+    if "invoice_ids" in req.params:
+        return "application/zip"
+    if req.params.get("file_format") == "pdf":
+        return "application/pdf"
+    return "application/xml"
+
+
+def download_batch(  # pylint: disable=R0913
+    blob_container_client: ContainerClient,
+    invoice_ids: list[str],
+    file_format: str,
+    xslt_transformer: etree.XSLT,
+    xml_cache: Optional[MutableMapping] = None,
+    pdf_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
+) -> bytes:
+    """
+    Downloads several invoices in parallel and returns them packed in a single zip archive.
+
+    Args:
+        blob_container_client (ContainerClient): BLOB storage container client
+        invoice_ids (list[str]): ids of invoices to download
+        file_format (str): "pdf" to pack pdf files, xml files are packed otherwise
+        xslt_transformer (etree.XSLT): XSLT object transforming xml invoice before creating pdf
+        xml_cache (Optional[MutableMapping], optional): cache of downloaded invoices. Defaults to None.
+        pdf_cache (Optional[MutableMapping], optional): cache of created pdf files. Defaults to None.
+        etag_cache (Optional[MutableMapping], optional): cache of (etag, invoice) tuples. Defaults to None.
+
+    Returns:
+        bytes: zip archive with one file per invoice, named "<invoice_id>.<file_format>"
+    """
+    invoices = download_xml.get_xml_bytes_batch(
+        container_client=blob_container_client,
+        invoice_ids=invoice_ids,
+        xml_cache=xml_cache,
+        etag_cache=etag_cache,
+    )
+
+    if file_format == "pdf":
+        files = {
+            f"{invoice_id}.pdf": create_pdf.main(
+                xml_chunks=(xml_bytes,),
+                xslt_transformer=xslt_transformer,
+                pdf_cache=pdf_cache,
+            )
+            for invoice_id, xml_bytes in invoices.items()
+        }
+    else:
+        files = {
+            f"{invoice_id}.xml": xml_bytes for invoice_id, xml_bytes in invoices.items()
+        }
+
+    return create_zip.main(files=files)
+
+
 def main(  # pylint: disable=R0913
     req: func.HttpRequest,
-    blob_connection_string: str,
-    blob_container_name: str,
+    blob_container_client: ContainerClient,
     exception_handler: Callable,
     xslt_transformer: etree.XSLT,
-    default_body: str = "Unexpected error, please contact function administrator.",
+    xml_cache: Optional[MutableMapping] = None,
+    pdf_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
+    default_body: bytes = b"Unexpected error, please contact function administrator.",
     default_status_code: int = http_client.INTERNAL_SERVER_ERROR,
-) -> tuple[str | bytes, int]:
+) -> tuple[bytes, int]:
     """
     Facilitates process of downloading xml file from BLOB storage.
 
+    Request either contains invoice_id (single file is returned) or comma-separated invoice_ids\
+    (zip archive with all requested files is returned).
+
     Args:
-        blob_connection_string (str): connection string to BLOB storage
-        blob_container_name (str): name of BLOB storage container
+        blob_container_client (ContainerClient): BLOB storage container client, created once at cold start
         exception_handler (Callable): function that handles exceptions
-        default_body (str, optional): string returned in case of unhandled exception.\
-            Defaults to "Unexpected error, please contact function administrator.".
+        xslt_transformer (etree.XSLT): XSLT object transforming xml invoice before creating pdf
+        xml_cache (Optional[MutableMapping], optional): cache of downloaded invoices, keyed by\
+            (container name, invoice id). Defaults to None (no caching).
+        pdf_cache (Optional[MutableMapping], optional): cache of created pdf files, keyed by xml content hash.\
+            Defaults to None (no caching).
+        etag_cache (Optional[MutableMapping], optional): cache of (etag, invoice) tuples, keyed like xml_cache.\
+            Invoices expired from xml_cache are revalidated with conditional download. Defaults to None.
+        default_body (bytes, optional): not returned, unhandled exception is answered with JSON error details\
+            (exception name and message). Kept for callers passing it.\
+            Defaults to b"Unexpected error, please contact function administrator.".
         default_status_code (int, optional): status code returned in case of unhandled exception.\
             Defaults to http_client.INTERNAL_SERVER_ERROR.
 
     Returns:
-        tuple[str | bytes, int]: http response body and status code
+        tuple[bytes, int]: http response body and status code
     """
     status_code = default_status_code
-    body = default_body
 
     try:
         params = read_params.main(req=req)
 
-        xml_bytes = download_xml.main(
-            connection_string=blob_connection_string,
-            container=blob_container_name,
-            invoice_id=params["invoice_id"],
-        )
+        if "invoice_ids" in params:
+            return (
+                download_batch(
+                    blob_container_client=blob_container_client,
+                    invoice_ids=params["invoice_ids"],
+                    file_format=params["file_format"],
+                    xslt_transformer=xslt_transformer,
+                    xml_cache=xml_cache,
+                    pdf_cache=pdf_cache,
+                    etag_cache=etag_cache,
+                ),
+                http_client.OK,
+            )
 
         if params["file_format"] == "pdf":
+            # xml is parsed chunk by chunk, while it is still being downloaded
+            xml_chunks = download_xml.get_xml_chunks(
+                container_client=blob_container_client,
+                invoice_id=params["invoice_id"],
+                xml_cache=xml_cache,
+                etag_cache=etag_cache,
+            )
             return (
-                create_pdf.main(xml_bytes=xml_bytes, xslt_transformer=xslt_transformer),
+                create_pdf.main(
+                    xml_chunks=xml_chunks,
+                    xslt_transformer=xslt_transformer,
+                    pdf_cache=pdf_cache,
+                ),
                 http_client.OK,
             )
 
+        xml_bytes = download_xml.get_xml_bytes(
+            container_client=blob_container_client,
+            invoice_id=params["invoice_id"],
+            xml_cache=xml_cache,
+            etag_cache=etag_cache,
+        )
         return xml_bytes, http_client.OK
 
     except DownloadBlobError as exc:
         return exception_handler(exc=exc)
 
-    except Exception:  # pylint: disable=W0718
+    except Exception as exc:  # pylint: disable=W0718
         # if unhandled exception, return default HTTP response with error details and use default status code (500)
-        exc_type, exc_value, exc_traceback = sys.exc_info()  # pylint: disable=W0612
-        body = str(object={"exception": exc_type.__name__, "message": exc_value})  # type: ignore
+        body = orjson.dumps({"exception": type(exc).__name__, "message": str(exc)})
         # "except Exceptions" is enough to know there is an exception with a name and a value
         return body, status_code
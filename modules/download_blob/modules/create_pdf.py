@@ -1,36 +1,84 @@
 """converts xml to pdf"""
+import hashlib
 import logging
-import io
+import threading
+from typing import Iterable, MutableMapping, Optional
 
 from lxml import etree
-from pdfdocument.document import PDFDocument
 
 
 log = logging.getLogger(name="log." + __name__)
 
+# parser is reused across invocations, but a fed parser holds state mid-parse, so each worker thread has its own
+_parsers = threading.local()
 
-def main(xml_bytes: bytes, xslt_transformer: etree.XSLT) -> bytes:
-    # Parse the XML input.
-    xml_parser = etree.XMLParser(remove_blank_text=True)
-    xml_tree = etree.parse(
-        source=io.BytesIO(initial_bytes=xml_bytes), parser=xml_parser
-    )
-    log.debug(msg=f"XML tree created: {xml_tree}.")
 
-    # Transform the XML input into an XSL-FO tree.
+def get_xml_parser() -> etree.XMLParser:
+    """
+    Returns XMLParser of the current thread, creating it on first use.
+
+    Returns:
+        xml_parser (etree.XMLParser): XMLParser object. collect_ids is turned off, as XSLT does not need ID table.
+    """
     try:
-        fo_tree = xslt_transformer(xml_tree)  # results in etree.XSLTApplyError
+        return _parsers.xml_parser
+    except AttributeError:
+        _parsers.xml_parser = etree.XMLParser(
+            remove_blank_text=True, huge_tree=False, collect_ids=False
+        )
+        log.debug(msg="XMLParser object created.")
+        return _parsers.xml_parser
+
+
+def main(
+    xml_chunks: Iterable[bytes],
+    xslt_transformer: etree.XSLT,
+    pdf_cache: Optional[MutableMapping] = None,
+) -> bytes:
+    # Parse the XML input incrementally, chunk by chunk, hashing it on the way for pdf_cache lookup.
+    xml_parser = get_xml_parser()
+    xml_hash = hashlib.blake2b(digest_size=16)
+    try:
+        for chunk in xml_chunks:
+            xml_parser.feed(chunk)
+            xml_hash.update(chunk)
+    except Exception:
+        # reset reused parser, so that the half-fed document does not leak into the next invocation
+        try:
+            xml_parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        raise
+    xml_tree = xml_parser.close()
+    log.debug("XML tree created: %r.", xml_tree)
+
+    # Identical invoices skip both XSLT and PDF generation.
+    cache_key = xml_hash.digest()
+    pdf = pdf_cache.get(cache_key) if pdf_cache is not None else None
+    if pdf is not None:
+        log.debug(msg="PDF found in cache.")
+        return pdf
+
+    # Transform the XML input into an HTML tree (styl.xsl outputs HTML, not XSL-FO).
+    try:
+        html_tree = xslt_transformer(xml_tree)  # results in etree.XSLTApplyError
         # XSLTApplyError('Cannot resolve URI http://crd.gov.pl/xml/schematy/dziedzinowe/mf/2022/01/05/eD/DefinicjeTypy/KodyKrajow_v10-0E.xsd')
     except etree.XSLTApplyError as exc:
-        log.error(msg=f"XSLTApplyError: {exc}.")
+        log.error("XSLTApplyError: %s.", exc)
         raise exc
-    log.debug(msg=f"XSL-FO tree created: {fo_tree}.")
+    log.debug("HTML tree created: %r.", html_tree)
+
+    # WeasyPrint needs native Pango/Cairo libraries; it is imported on first pdf request only, so that a host
+    # without them still serves xml downloads and CosmosDB queries (ImportError/OSError ends up as HTTP 500).
+    import weasyprint  # pylint: disable=C0415
+
+    # Render the PDF output from the HTML tree. Serialized html is passed on as bytes in stylesheet's output encoding,
+    # without decoding it to str first; write_pdf() returns bytes, passed to HttpResponse without further copies.
+    pdf = weasyprint.HTML(
+        string=bytes(html_tree), encoding=html_tree.docinfo.encoding
+    ).write_pdf()
 
-    # Generate the PDF output from the XSL-FO tree.
-    pdf_bytes = io.BytesIO()
-    pdf_doc = PDFDocument(pdf_bytes)
-    pdf_doc.init_report()
-    pdf_doc.add_raw_data(fo_tree.tostring())
-    pdf_doc.generate()
+    if pdf_cache is not None:
+        pdf_cache[cache_key] = pdf
 
-    return pdf_bytes.getvalue()
+    return pdf
@@ -0,0 +1,29 @@
+"""Packs several files into a single zip archive."""
+
+import io
+import logging
+import zipfile
+
+log = logging.getLogger(name="log." + __name__)
+
+
+def main(files: dict[str, bytes]) -> bytes:
+    """
+    Packs files into zip archive, built in memory.
+
+    Parameters:
+        files (dict[str, bytes]): Files content, keyed by file name.
+
+    Returns:
+        zip_bytes (bytes): Zip archive in bytes.
+    """
+    log.debug("Packing %s files into zip archive.", len(files))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(
+        file=buffer, mode="w", compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        for file_name, content in files.items():
+            archive.writestr(zinfo_or_arcname=file_name, data=content)
+
+    log.debug(msg="Zip archive created.")
+    return buffer.getvalue()
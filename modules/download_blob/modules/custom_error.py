@@ -1,9 +1,9 @@
 """Custom exception class for for handling common errors in query_cosmosDB."""
 
-import json
 import logging
 from typing import Optional
 
+import orjson
 
 log = logging.getLogger(name="log." + __name__)
 
@@ -43,17 +43,21 @@ class DownloadBlobError(Exception):
         except ValueError as exc:
             custom_message = "Example custom message."
             raise QueryCosmosDBError(
-                exception_type=exc.__class__.__name__,
+                exception_type=type(exc).__name__,
                 details=exc.message,
                 message=custom_message,
                 status_code=http_client.INTERNAL_SERVER_ERROR,
         )
     """
 
-    exception_type: str
-    details: str
-    message: str
-    status_code: int
+    # attributes are kept in slots, so that no per-instance __dict__ is allocated on raise
+    __slots__ = (
+        "exception_type",
+        "details",
+        "message",
+        "status_code",
+        "error_response",
+    )
 
     def __init__(
         self,
@@ -95,7 +99,7 @@ class DownloadBlobError(Exception):
 
     def convert_to_json(self, error_response_dict) -> str:
         """
-        Converts error_response_dict to JSON string. Provides fallback in case of TypeError.
+        Converts error_response_dict to JSON string. Values that are not JSON serializable are converted to string.
 
         Returns:
             error_response (str):
@@ -103,29 +107,17 @@ class DownloadBlobError(Exception):
                 of error_response_dict (without JSON formatting).
         """
         try:
-            error_response = json.dumps(
-                obj=error_response_dict, indent=4, sort_keys=False, ensure_ascii=False
+            error_response = orjson.dumps(error_response_dict, default=str).decode(
+                encoding="utf-8"
             )
 
-        except TypeError:
-            try:
-                for key, value in error_response_dict.items():
-                    error_response_dict[key] = str(object=value)
-
-                error_response = json.dumps(
-                    obj=error_response_dict,
-                    indent=4,
-                    sort_keys=False,
-                    ensure_ascii=False,
-                )
-
-            except Exception:  # pylint: disable=W0718
-                # catching general exception is intentional here
-                # I can't think of a scenario where this would happen, but just in case.
-                log.warning(
-                    msg=f"Failed to convert error_response_dict to JSON after converting values to string.\
-                        error_response_dict: {error_response_dict}"
-                )
-                error_response = str(object=error_response_dict)
+        except Exception:  # pylint: disable=W0718
+            # catching general exception is intentional here
+            # I can't think of a scenario where this would happen, but just in case.
+            log.warning(
+                "Failed to convert error_response_dict to JSON. error_response_dict: %s",
+                error_response_dict,
+            )
+            error_response = str(object=error_response_dict)
 
         return error_response
@@ -1,7 +1,11 @@
 """Sets up connection with azure BLOB storage."""
+
+import concurrent.futures
+import functools
 import http.client as http_client
 import logging
 import sys
+from typing import Iterable, Iterator, MutableMapping, Optional
 
 from azure.storage.blob import (
     BlobServiceClient,
@@ -9,16 +13,18 @@ from azure.storage.blob import (
     BlobClient,
     StorageStreamDownloader,
 )
+from azure.core import MatchConditions
 import azure.core.exceptions as azure_exceptions
 
 from .custom_error import DownloadBlobError
 
-
 log = logging.getLogger(name="log." + __name__)
 
 
+@functools.lru_cache(maxsize=4)
 def create_blob_service_client(conn_str: str) -> BlobServiceClient:
-    """Creates BlobServiceClient object.
+    """Creates BlobServiceClient object. Cached, so that the client (and its HTTP connection pool)\
+    is reused across function invocations on the same worker.
 
     Parameters:
         conn_str (str): BLOB storage connection string.
@@ -30,20 +36,22 @@ def create_blob_service_client(conn_str: str) -> BlobServiceClient:
         None. BlobServiceClient is a local object and does not make any calls to the Azure Storage Blob service.
     """
     log.debug(msg="Creating BLOB service client.")
-    client = BlobServiceClient.from_connection_string(conn_str=conn_str)
+    # bigger block size means fewer reads of the response stream per downloaded invoice (SDK default: 4 KiB)
+    client = BlobServiceClient.from_connection_string(
+        conn_str=conn_str, connection_data_block_size=64 * 1024
+    )
     log.debug(msg="BLOB service client created.")
 
     return client
 
 
-def create_blob_container_client(
-    blob_service_client: BlobServiceClient, container: str
-) -> ContainerClient:
+@functools.lru_cache(maxsize=4)
+def create_blob_container_client(conn_str: str, container: str) -> ContainerClient:
     """
-    Creates ContainerClient object.
+    Creates ContainerClient object. Cached per (conn_str, container) pair, reusing cached BlobServiceClient.
 
     Args:
-        client (BlobServiceClient): BlobServiceClient object.
+        conn_str (str): BLOB storage connection string.
         container (str): BLOB storage container name.
 
     Returns:
@@ -53,6 +61,7 @@ def create_blob_container_client(
         None. ContainerClient is a local object and does not make any calls to the Azure Storage Blob service.
     """
     log.debug(msg="Creating ContainerClient object.")
+    blob_service_client = create_blob_service_client(conn_str=conn_str)
     container_client = blob_service_client.get_container_client(container=container)
     log.debug(msg="ContainerClient object created.")
 
@@ -74,35 +83,49 @@ def get_blob_client(container_client: ContainerClient, file_name: str) -> BlobCl
     """
     log.debug(msg="Creating BlobClient object.")
     blob_client = container_client.get_blob_client(blob=file_name)
-    log.debug(msg=f"BlobClient object created for {file_name}.")
+    log.debug("BlobClient object created for %s.", file_name)
 
     return blob_client
 
 
 def download_blob(
-    blob_client: BlobClient, timeout: int
+    blob_client: BlobClient,
+    timeout: int,
+    max_concurrency: int,
+    etag: Optional[str] = None,
 ) -> StorageStreamDownloader[bytes]:
     """Downloads a blob to the StorageStreamDownloader (memory).
 
     Parameters:
         blob_client (BlobClient): BlobClient object.
         timeout (int): timeout in seconds.
+        max_concurrency (int): number of parallel connections used to download ranges of larger blobs.
+        etag (Optional[str], optional): ETag of previously downloaded copy. If given, request is sent with\
+            If-None-Match header and BLOB storage does not send the body again if blob is unchanged. Defaults to None.
 
     Returns:
         blob (StorageStreamDownloader[bytes]): StorageStreamDownloader object.
 
     Raises:
         DownloadBlobError: if specified blob is not found or if there is a problem with the request.
+        azure.core.exceptions.ResourceNotModifiedError: if etag is given and blob has not changed since.
     """
     log.debug(msg="Downloading blob.")
+    conditions = (
+        {"etag": etag, "match_condition": MatchConditions.IfModified}
+        if etag is not None
+        else {}
+    )
     try:
-        blob = blob_client.download_blob(timeout=timeout)
+        blob = blob_client.download_blob(
+            timeout=timeout, max_concurrency=max_concurrency, **conditions
+        )
     except (
         azure_exceptions.ResourceNotFoundError,
         azure_exceptions.ServiceRequestError,
     ) as exc:
         raise DownloadBlobError(
-            exception_type=str(object=exc.__class__.__name__),
+            exception_type=type(exc).__name__,
             details=str(object=exc.exc_value),
             message=exc.exc_msg,
             status_code=http_client.INTERNAL_SERVER_ERROR,
@@ -123,8 +146,11 @@ def read_blob(blob: StorageStreamDownloader[bytes]) -> bytes:
         invoice (bytes): Invoice in bytes.
 
     Raises:
-        #TODO: add exception docstring
-
+        DownloadBlobError (status code 500), raised from any exception of the read, e.g.:
+            If blob was deleted before all of its content was read. (azure.core.exceptions.ResourceNotFoundError)
+            If conditional request for remaining content was answered with 304 Not Modified.\
+                (azure.core.exceptions.ResourceNotModifiedError)
+            If connection with BLOB storage failed while reading. (azure.core.exceptions.ServiceRequestError)
     """
     log.debug(msg="Reading blob.")
     try:
@@ -132,7 +158,7 @@ def read_blob(blob: StorageStreamDownloader[bytes]) -> bytes:
     except Exception as exc:  # pylint: disable=W0703
         message = "Failed to read blob object."
         raise DownloadBlobError(
-            exception_type=exc.__class__.__name__,
+            exception_type=type(exc).__name__,
             details=str(object=sys.exc_info()),
             message=message,
             status_code=http_client.INTERNAL_SERVER_ERROR,
@@ -142,36 +168,291 @@ def read_blob(blob: StorageStreamDownloader[bytes]) -> bytes:
     return invoice
 
 
-def main(
-    connection_string: str, container: str, invoice_id: str, timeout: int = 90
+def iter_blob_chunks(blob: StorageStreamDownloader[bytes]) -> Iterator[bytes]:
+    """Yields blob content chunk by chunk, as it arrives from BLOB storage.
+
+    Parameters:
+        blob (StorageStreamDownloader[bytes]): StorageStreamDownloader object.
+
+    Yields:
+        chunk (bytes): Next chunk of the invoice.
+
+    Raises:
+        DownloadBlobError: if failed to read any of the chunks.
+    """
+    log.debug(msg="Streaming blob.")
+    try:
+        yield from blob.chunks()
+    except Exception as exc:  # pylint: disable=W0703
+        message = "Failed to read blob object."
+        raise DownloadBlobError(
+            exception_type=type(exc).__name__,
+            details=str(object=sys.exc_info()),
+            message=message,
+            status_code=http_client.INTERNAL_SERVER_ERROR,
+        ) from exc
+
+    log.debug(msg="Blob streamed.")
+
+
+def store_xml(  # pylint: disable=R0913
+    key: tuple[str, str],
+    etag: str,
+    xml_bytes: bytes,
+    xml_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
+) -> None:
+    """Stores invoice in xml_cache and, together with its ETag, in etag_cache.
+
+    Parameters:
+        key (tuple[str, str]): Cache key: (container name, invoice id).
+        etag (str): ETag of the blob.
+        xml_bytes (bytes): Invoice in bytes.
+        xml_cache (Optional[MutableMapping], optional): Cache of downloaded invoices. Defaults to None (no caching).
+        etag_cache (Optional[MutableMapping], optional): Cache of (etag, invoice) tuples. Defaults to None.
+    """
+    if xml_cache is not None:
+        xml_cache[key] = xml_bytes
+    if etag_cache is not None:
+        etag_cache[key] = (etag, xml_bytes)
+    log.debug("Invoice %s cached.", key)
+
+
+def cache_chunks(
+    chunks: Iterable[bytes],
+    key: tuple[str, str],
+    etag: str,
+    xml_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
+) -> Iterator[bytes]:
+    """Yields chunks unchanged and stores the joined content in caches once all chunks were read.
+
+    Parameters:
+        chunks (Iterable[bytes]): Chunks of the invoice, see iter_blob_chunks.
+        key (tuple[str, str]): Cache key: (container name, invoice id).
+        etag (str): ETag of the blob.
+        xml_cache (Optional[MutableMapping], optional): Cache of downloaded invoices. Defaults to None.
+        etag_cache (Optional[MutableMapping], optional): Cache of (etag, invoice) tuples. Defaults to None.
+
+    Yields:
+        chunk (bytes): Next chunk of the invoice.
+    """
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+
+    store_xml(
+        key=key,
+        etag=etag,
+        xml_bytes=b"".join(parts),
+        xml_cache=xml_cache,
+        etag_cache=etag_cache,
+    )
+
+
+def download_or_revalidate(
+    container_client: ContainerClient,
+    invoice_id: str,
+    key: tuple[str, str],
+    etag_cache: Optional[MutableMapping] = None,
+) -> tuple[Optional[StorageStreamDownloader[bytes]], Optional[bytes]]:
+    """Starts downloading invoice. If etag_cache holds a copy of the invoice, download is conditional\
+    (If-None-Match) and unchanged blob is not transferred again.
+
+    Parameters:
+        container_client (ContainerClient): ContainerClient object.
+        invoice_id (str): Invoice id.
+        key (tuple[str, str]): Cache key: (container name, invoice id).
+        etag_cache (Optional[MutableMapping], optional): Cache of (etag, invoice) tuples. Defaults to None.
+
+    Returns:
+        tuple[Optional[StorageStreamDownloader[bytes]], Optional[bytes]]: (blob, None) if blob has to be read,\
+            (None, cached invoice) if cached copy is still valid.
+    """
+    cached = etag_cache.get(key) if etag_cache is not None else None
+    if cached is None:
+        return main(container_client=container_client, invoice_id=invoice_id), None
+
+    etag, xml_bytes = cached
+    try:
+        blob = main(container_client=container_client, invoice_id=invoice_id, etag=etag)
+    except azure_exceptions.ResourceNotModifiedError:
+        log.debug("Invoice %s not modified, cached copy revalidated.", key)
+        return None, xml_bytes
+
+    return blob, None
+
+
+def get_xml_bytes(
+    container_client: ContainerClient,
+    invoice_id: str,
+    xml_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
 ) -> bytes:
-    """Downloads xml file from BLOB storage.
+    """Returns invoice from xml_cache, or downloads it from BLOB storage (and caches it) on cache miss.
 
     Parameters:
-        connection_string (str): BLOB storage connection string.
-        container (str): BLOB storage container name.
+        container_client (ContainerClient): ContainerClient object.
         invoice_id (str): Invoice id.
-        timeout (int, optional): Timeout in seconds. Defaults to 90.
+        xml_cache (Optional[MutableMapping], optional): Cache of downloaded invoices. Defaults to None (no caching).
+        etag_cache (Optional[MutableMapping], optional): Cache of (etag, invoice) tuples, used to revalidate\
+            invoices no longer in xml_cache with conditional download. Defaults to None.
 
     Returns:
         xml_bytes (bytes): Invoice in bytes.
+    """
+    key = (container_client.container_name, invoice_id)
+    xml_bytes = xml_cache.get(key) if xml_cache is not None else None
+    if xml_bytes is not None:
+        log.debug("Invoice %s found in cache.", key)
+        return xml_bytes
+
+    blob, xml_bytes = download_or_revalidate(
+        container_client=container_client,
+        invoice_id=invoice_id,
+        key=key,
+        etag_cache=etag_cache,
+    )
+    if blob is None:
+        if xml_cache is not None:
+            xml_cache[key] = xml_bytes
+        return xml_bytes
 
+    xml_bytes = read_blob(blob=blob)
+    store_xml(
+        key=key,
+        etag=blob.properties.etag,
+        xml_bytes=xml_bytes,
+        xml_cache=xml_cache,
+        etag_cache=etag_cache,
+    )
 
-    """
-    file_name = invoice_id + ".xml"
+    return xml_bytes
 
-    blob_service_client = create_blob_service_client(conn_str=connection_string)
 
-    container_client = create_blob_container_client(
-        blob_service_client=blob_service_client, container=container
+def get_xml_chunks(
+    container_client: ContainerClient,
+    invoice_id: str,
+    xml_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
+) -> Iterable[bytes]:
+    """Returns invoice from xml_cache as a single chunk, or streams it chunk by chunk from BLOB storage\
+    (caching it once fully read) on cache miss.
+
+    Parameters:
+        container_client (ContainerClient): ContainerClient object.
+        invoice_id (str): Invoice id.
+        xml_cache (Optional[MutableMapping], optional): Cache of downloaded invoices. Defaults to None (no caching).
+        etag_cache (Optional[MutableMapping], optional): Cache of (etag, invoice) tuples, used to revalidate\
+            invoices no longer in xml_cache with conditional download. Defaults to None.
+
+    Returns:
+        xml_chunks (Iterable[bytes]): Chunks of the invoice.
+    """
+    key = (container_client.container_name, invoice_id)
+    xml_bytes = xml_cache.get(key) if xml_cache is not None else None
+    if xml_bytes is not None:
+        log.debug("Invoice %s found in cache.", key)
+        return (xml_bytes,)
+
+    blob, xml_bytes = download_or_revalidate(
+        container_client=container_client,
+        invoice_id=invoice_id,
+        key=key,
+        etag_cache=etag_cache,
     )
+    if blob is None:
+        if xml_cache is not None:
+            xml_cache[key] = xml_bytes
+        return (xml_bytes,)
+
+    xml_chunks = iter_blob_chunks(blob=blob)
+
+    if xml_cache is not None or etag_cache is not None:
+        return cache_chunks(
+            chunks=xml_chunks,
+            key=key,
+            etag=blob.properties.etag,
+            xml_cache=xml_cache,
+            etag_cache=etag_cache,
+        )
+
+    return xml_chunks
+
+
+def get_xml_bytes_batch(
+    container_client: ContainerClient,
+    invoice_ids: list[str],
+    xml_cache: Optional[MutableMapping] = None,
+    etag_cache: Optional[MutableMapping] = None,
+    max_workers: int = 8,
+) -> dict[str, bytes]:
+    """Downloads several invoices in parallel, so that the whole batch takes about as long as the slowest download.
+
+    Parameters:
+        container_client (ContainerClient): ContainerClient object.
+        invoice_ids (list[str]): Invoice ids.
+        xml_cache (Optional[MutableMapping], optional): Cache of downloaded invoices. Defaults to None (no caching).
+        etag_cache (Optional[MutableMapping], optional): Cache of (etag, invoice) tuples. Defaults to None.
+        max_workers (int, optional): Maximum number of simultaneous downloads. Defaults to 8.
+
+    Returns:
+        invoices (dict[str, bytes]): Invoices in bytes, keyed by invoice id, in order of invoice_ids.
+
+    Raises:
+        DownloadBlobError: if failed to download any of the invoices.
+    """
+    log.debug("Downloading batch of %s invoices.", len(invoice_ids))
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(max_workers, len(invoice_ids)) or 1
+    ) as executor:
+        xml_files = executor.map(
+            lambda invoice_id: get_xml_bytes(
+                container_client=container_client,
+                invoice_id=invoice_id,
+                xml_cache=xml_cache,
+                etag_cache=etag_cache,
+            ),
+            invoice_ids,
+        )
+        invoices = dict(zip(invoice_ids, xml_files))
+
+    log.debug("Batch of %s invoices downloaded.", len(invoices))
+    return invoices
+
+
+def main(
+    container_client: ContainerClient,
+    invoice_id: str,
+    timeout: int = 90,
+    max_concurrency: int = 4,
+    etag: Optional[str] = None,
+) -> StorageStreamDownloader[bytes]:
+    """Starts downloading xml file from BLOB storage. Content is read by caller, either at once with read_blob()\
+    or chunk by chunk with iter_blob_chunks().
+
+    Parameters:
+        container_client (ContainerClient): ContainerClient object, see create_blob_container_client.
+        invoice_id (str): Invoice id.
+        timeout (int, optional): Timeout in seconds. Defaults to 90.
+        max_concurrency (int, optional): Number of parallel range requests used for larger blobs. Defaults to 4.
+        etag (Optional[str], optional): ETag of cached copy, makes download conditional. Defaults to None.
+
+    Returns:
+        blob (StorageStreamDownloader[bytes]): StorageStreamDownloader object.
+    """
+    file_name = invoice_id + ".xml"
 
     blob_client = get_blob_client(
         container_client=container_client, file_name=file_name
     )
 
-    blob = download_blob(blob_client=blob_client, timeout=timeout)
-
-    xml_bytes = read_blob(blob=blob)
+    blob = download_blob(
+        blob_client=blob_client,
+        timeout=timeout,
+        max_concurrency=max_concurrency,
+        etag=etag,
+    )
 
-    return xml_bytes
+    return blob
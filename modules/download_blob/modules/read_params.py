@@ -1,6 +1,8 @@
 """Reads parameters of received http request"""
+
 import http.client as http_client
 import logging
+import re
 from typing import Optional
 
 import azure.functions as func
@@ -9,38 +11,105 @@ from .custom_error import DownloadBlobError
 
 log = logging.getLogger(name="log." + __name__)
 
+# KSeF invoice ids consist of letters, digits and hyphens only (matched with fullmatch, so no trailing newline)
+INVOICE_ID_PATTERN = re.compile(pattern=r"[A-Za-z0-9-]{1,64}")
+
+# upper limit of invoices downloaded in a single request (invoice_ids parameter)
+MAX_BATCH_SIZE = 50
+
+
+def validate_invoice_id(invoice_id: str) -> None:
+    """
+    Checks format of invoice id.
+
+    Args:
+        invoice_id (str): invoice id read from the request.
+
+    Raises:
+        DownloadBlobError: if invoice_id has invalid format.
+    """
+    if not INVOICE_ID_PATTERN.fullmatch(invoice_id):
+        message = "Invalid invoice_id parameter format."
+        raise DownloadBlobError(
+            exception_type="ValueError",
+            details=f"ValueError: invoice_id={invoice_id!r}",
+            message=message,
+            status_code=http_client.BAD_REQUEST,
+        )
+
 
-def main(req: func.HttpRequest, params_list: Optional[list] = None) -> dict[str, str]:
+def parse_invoice_ids(invoice_ids: str) -> list[str]:
+    """
+    Splits comma-separated invoice_ids parameter into list of unique invoice ids, keeping their order.
+
+    Args:
+        invoice_ids (str): value of invoice_ids parameter, e.g. "id1,id2,id3".
+
+    Raises:
+        DownloadBlobError: if there are more than MAX_BATCH_SIZE invoice ids.
+        DownloadBlobError: if any of invoice ids has invalid format.
+
+    Returns:
+        list[str]: list of invoice ids.
+    """
+    ids = list(
+        dict.fromkeys(invoice_id.strip() for invoice_id in invoice_ids.split(","))
+    )
+    if len(ids) > MAX_BATCH_SIZE:
+        message = f"Too many invoice ids in the request (max {MAX_BATCH_SIZE})."
+        raise DownloadBlobError(
+            exception_type="ValueError",
+            details=f"ValueError: {len(ids)} invoice ids",
+            message=message,
+            status_code=http_client.BAD_REQUEST,
+        )
+
+    for invoice_id in ids:
+        validate_invoice_id(invoice_id=invoice_id)
+
+    return ids
+
+
+def main(
+    req: func.HttpRequest, params_list: Optional[list] = None
+) -> dict[str, str | list[str]]:
     """
     Reads parameters of received http request.
 
     Args:
         req (azure.functions.HttpRequest): HTTP request sent to Azure Function's endpoint.
         params_list (Optional[list], optional): list of parameters expected in the request.\
-            Defaults to ["invoice_id", "single_file_download", "file_format"].
+            Defaults to ["invoice_ids", "file_format"] if invoice_ids parameter is present in the request\
+            (batch download), ["invoice_id", "file_format"] otherwise.
 
     Raises:
         DownloadBlobError: if any of the expected parameters is not found in the request.
+        DownloadBlobError: if invoice_id (or any of invoice_ids) parameter has invalid format.
 
     Returns:
-        dict[str, str]: dictionary of parameters and their values.
+        dict[str, str | list[str]]: dictionary of parameters and their values. invoice_ids value is a list.
     """
-    log.debug(msg=f"Reading parameters of the request {req}.")
+    log.debug("Reading parameters of the request %s.", req)
     if params_list is None:
-        params_list = ["invoice_id", "file_format"]
-
-    params = {}
-    for param in params_list:
-        try:
-            params[param] = req.params[param]
-        except KeyError as exc:
-            message = f"No {param} parameter in the request."
-            raise DownloadBlobError(
-                exception_type="KeyError",
-                details=f"KeyError: {param}",
-                message=message,
-                status_code=http_client.BAD_REQUEST,
-            ) from exc
-
-    log.debug(msg=f"Parameters of the request {req} read successfully.")
+        id_param = "invoice_ids" if "invoice_ids" in req.params else "invoice_id"
+        params_list = [id_param, "file_format"]
+
+    params = {param: req.params.get(param) for param in params_list}
+    missing = [param for param, value in params.items() if value is None]
+    if missing:
+        message = f"No {missing[0]} parameter in the request."
+        raise DownloadBlobError(
+            exception_type="KeyError",
+            details=f"KeyError: {missing[0]}",
+            message=message,
+            status_code=http_client.BAD_REQUEST,
+        )
+
+    if "invoice_id" in params:
+        validate_invoice_id(invoice_id=params["invoice_id"])
+
+    if "invoice_ids" in params:
+        params["invoice_ids"] = parse_invoice_ids(invoice_ids=params["invoice_ids"])
+
+    log.debug("Parameters of the request %s read successfully.", req)
     return params
@@ -1,6 +1,10 @@
 """Sets up CosmosDB connection."""
+
+import functools
 import http.client as http_client
 import logging
+import threading
+from typing import Optional
 
 from azure.cosmos import (
     exceptions as cosmos_exceptions,
@@ -9,14 +13,100 @@ from azure.cosmos import (
     ContainerProxy,
 )
 from azure.core import exceptions as azure_exceptions
+from azure.core.pipeline.transport import RequestsTransport
+import requests
+from requests.adapters import HTTPAdapter
 
 
 from .custom_error import QueryCosmosDBError
 
 log = logging.getLogger(name="log." + __name__)
 
+# held while container client is looked up or created, see main
+SETUP_LOCK = threading.Lock()
+
+# exception type: (custom message, HTTP status code - None means status code of the exception)
+CLIENT_ERRORS: dict[type, tuple[str, Optional[int]]] = {
+    azure_exceptions.ServiceRequestError: (
+        "Failed to connect with host declared in AccountEndpoint. Check connection string.",
+        http_client.NOT_FOUND,
+    ),
+    cosmos_exceptions.CosmosResourceNotFoundError: (
+        "CosmosDB host URL is invalid. Check connection string.",
+        None,
+    ),
+    cosmos_exceptions.CosmosClientTimeoutError: (
+        "Request timeout.",
+        http_client.REQUEST_TIMEOUT,
+    ),
+    cosmos_exceptions.CosmosHttpResponseError: (
+        "Unauthorized. The input authorization token can't serve the request. Check connection string.",
+        None,
+    ),
+}
+DATABASE_ERRORS: dict[type, tuple[str, Optional[int]]] = {
+    cosmos_exceptions.CosmosResourceNotFoundError: (
+        "CosmosDB database {database_id} was not found.",
+        None,
+    ),
+    cosmos_exceptions.CosmosClientTimeoutError: (
+        "Request timeout.",
+        http_client.REQUEST_TIMEOUT,
+    ),
+}
+CONTAINER_ERRORS: dict[type, tuple[str, Optional[int]]] = {
+    cosmos_exceptions.CosmosResourceNotFoundError: (
+        "CosmosDB container {container_id} was not found.",
+        None,
+    ),
+    cosmos_exceptions.CosmosClientTimeoutError: (
+        "Request timeout.",
+        http_client.REQUEST_TIMEOUT,
+    ),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def create_session(
+    pool_connections: int = 4, pool_maxsize: int = 100
+) -> requests.Session:
+    """
+    Creates requests.Session shared by all CosmosClient instances of the worker, so that they draw from\
+    a single connection pool. Retries are left to azure-core's RetryPolicy (adapter retries would multiply them).
+
+    Parameters:
+        pool_connections (int, optional):
+            Number of hosts (account endpoint and regional endpoints) to keep connection pools for. Defaults to 4.
+        pool_maxsize (int, optional):
+            Maximum number of connections kept open to a single host. Defaults to 100.
+
+    Returns:
+        session (requests.Session): Session with pooled HTTPAdapter mounted for both http:// and https://.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount(prefix="https://", adapter=adapter)
+    session.mount(prefix="http://", adapter=adapter)
+    log.debug(msg="requests.Session for CosmosDB created.")
+
+    return session
+
 
-def setup_cosmos_client(connection_string: str) -> CosmosClient:
+def create_transport() -> RequestsTransport:
+    """
+    Creates HTTP transport for CosmosClient, backed by the shared, pooled session (see create_session).
+    Python SDK supports Gateway (HTTPS) connection mode only, so pool size is the connection limit to tune.
+
+    Returns:
+        transport (azure.core.pipeline.transport.RequestsTransport):
+            Transport to be passed to CosmosClient. Does not close the shared session when client is closed.
+    """
+    return RequestsTransport(session=create_session(), session_owner=False)
+
+
+def setup_cosmos_client(
+    connection_string: str, consistency_level: Optional[str] = None
+) -> CosmosClient:
     """
     Creates a CosmosClient instance from a connection string. This can be retrieved from the Azure portal.
     For full list of optional keyword arguments, see the CosmosClient constructor.
@@ -24,6 +114,9 @@ def setup_cosmos_client(connection_string: str) -> CosmosClient:
     Parameters:
         connection_string (str):
             The CosmosDB connection string.
+        consistency_level (Optional[str], optional):
+            Consistency level of the client, e.g. "Session". Function only reads data, so it may not need account's\
+            default (possibly Strong) consistency. Can only relax account's level. Defaults to None (account's level).
 
     Returns:
         client (azure.cosmos.CosmosClient):
@@ -40,39 +133,15 @@ def setup_cosmos_client(connection_string: str) -> CosmosClient:
     log.debug(msg="Setting up CosmosDB connection.")
 
     try:
-        client = CosmosClient.from_connection_string(conn_str=connection_string)
-
-    except azure_exceptions.ServiceRequestError as exc:
-        custom_message = "Failed to connect with host declared in AccountEndpoint. Check connection string."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=http_client.NOT_FOUND,
-        ) from exc
-    except cosmos_exceptions.CosmosResourceNotFoundError as exc:
-        custom_message = "CosmosDB host URL is invalid. Check connection string."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=exc.status_code,  # type: ignore
-        ) from exc
-    except cosmos_exceptions.CosmosClientTimeoutError as exc:
-        custom_message = "Request timeout."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=http_client.REQUEST_TIMEOUT,
-        ) from exc
-    except cosmos_exceptions.CosmosHttpResponseError as exc:
-        custom_message = "Unauthorized. The input authorization token can't serve the request. Check connection string."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=exc.status_code,  # type: ignore
+        client = CosmosClient.from_connection_string(
+            conn_str=connection_string,
+            consistency_level=consistency_level,
+            transport=create_transport(),
+        )
+
+    except tuple(CLIENT_ERRORS) as exc:
+        raise QueryCosmosDBError.from_exception(
+            exc=exc, error_map=CLIENT_ERRORS
         ) from exc
 
     log.debug(msg="CosmosDB connection set up succesfully.")
@@ -101,21 +170,9 @@ def setup_database_client(client: CosmosClient, database_id: str) -> DatabasePro
 
     try:
         database = client.get_database_client(database=database_id)
-    except cosmos_exceptions.CosmosResourceNotFoundError as exc:
-        custom_message = f"CosmosDB database {database_id} was not found."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=exc.status_code,  # type: ignore
-        ) from exc
-    except cosmos_exceptions.CosmosClientTimeoutError as exc:
-        custom_message = "Request timeout."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=http_client.REQUEST_TIMEOUT,
+    except tuple(DATABASE_ERRORS) as exc:
+        raise QueryCosmosDBError.from_exception(
+            exc=exc, error_map=DATABASE_ERRORS, database_id=database_id
         ) from exc
 
     log.debug(msg="CosmosDB DatabaseProxy set up succesfully.")
@@ -148,21 +205,9 @@ def setup_container_client(
 
     try:
         container = database.get_container_client(container=container_id)
-    except cosmos_exceptions.CosmosResourceNotFoundError as exc:
-        custom_message = f"CosmosDB container {container_id} was not found."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=exc.status_code,  # type: ignore
-        ) from exc
-    except cosmos_exceptions.CosmosClientTimeoutError as exc:
-        custom_message = "Request timeout."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=http_client.REQUEST_TIMEOUT,
+    except tuple(CONTAINER_ERRORS) as exc:
+        raise QueryCosmosDBError.from_exception(
+            exc=exc, error_map=CONTAINER_ERRORS, container_id=container_id
         ) from exc
 
     log.debug(msg="CosmosDB ContainerProxy set up succesfully.")
@@ -170,12 +215,49 @@ def setup_container_client(
     return container
 
 
-def main(connection_string: str, database_id: str, container_id: str) -> ContainerProxy:
+@functools.lru_cache(maxsize=8)
+def create_container_client(
+    connection_string: str,
+    database_id: str,
+    container_id: str,
+    consistency_level: Optional[str] = None,
+) -> ContainerProxy:
+    """
+    Creates CosmosClient, DatabaseProxy and ContainerProxy. Cached per (connection_string, database_id, container_id,\
+    consistency_level), so that the client (its connection pool and account metadata) is reused across function\
+    invocations on the same worker. Failures are not cached. See main for parameters and exceptions.
+    """
+    cosmos_client = setup_cosmos_client(
+        connection_string=connection_string, consistency_level=consistency_level
+    )
+
+    database_proxy = setup_database_client(
+        client=cosmos_client,
+        database_id=database_id,
+    )
+
+    container_proxy = setup_container_client(
+        database=database_proxy,
+        container_id=container_id,
+    )
+
+    log.info(msg="CosmosDB connection set up succesfully.")
+    return container_proxy
+
+
+def main(
+    connection_string: str,
+    database_id: str,
+    container_id: str,
+    consistency_level: Optional[str] = None,
+) -> ContainerProxy:
     """
     Sets up CosmosDB connection and returns a ContainerProxy instance for a container with specified ID (name):\n
         Creates a CosmosClient instance from the parameter 'connection_string'.\n
         Retrieves an existing CosmosDB database with the parameter 'database_id'.\n
         Gets a CosmosDB ContainerProxy for a container with the specified parameter 'container_id'.\n
+    Client is created once per (connection_string, database_id, container_id, consistency_level) and reused across\
+    function invocations on the same worker, see create_container_client.
 
     Parameters:
         connection_string (str):
@@ -184,6 +266,8 @@ def main(connection_string: str, database_id: str, container_id: str) -> Contain
             The ID (name) of the  CosmosDB database to read.
         container_id (str):
             The ID (name) of the container to be retrieved.
+        consistency_level (Optional[str], optional):
+            Consistency level of the client, see setup_cosmos_client. Defaults to None (account's level).
 
     Returns:
         container (azure.cosmos.ContainerProxy):
@@ -209,18 +293,12 @@ def main(connection_string: str, database_id: str, container_id: str) -> Contain
 
 
     """
-
-    cosmos_client = setup_cosmos_client(connection_string=connection_string)
-
-    database_proxy = setup_database_client(
-        client=cosmos_client,
-        database_id=database_id,
-    )
-
-    container_proxy = setup_container_client(
-        database=database_proxy,
-        container_id=container_id,
-    )
-
-    log.info(msg="CosmosDB connection set up succesfully.")
-    return container_proxy
+    # invocations run in worker threads; without the lock, concurrent cold-start invocations would each build
+    # their own client (and fetch account metadata) before the first one is cached
+    with SETUP_LOCK:
+        return create_container_client(
+            connection_string=connection_string,
+            database_id=database_id,
+            container_id=container_id,
+            consistency_level=consistency_level,
+        )
@@ -1,9 +1,9 @@
 """Custom exception class for for handling common errors in query_cosmosDB."""
 
-import json
 import logging
-from typing import Optional
+from typing import Any, Mapping, Optional
 
+import orjson
 
 log = logging.getLogger(name="log." + __name__)
 
@@ -32,7 +32,7 @@ class QueryCosmosDBError(Exception):
         details (Optional[str]): Exception details.
         message (Optional[str]): Custom exception message.
         status_code (Optional[int]): HTTP status code.
-        error_response (str): JSON string representing error_response_dict.
+        error_response (str): JSON string representing error_response_dict, built lazily on first access.
 
     Raises:
         Exception: If failed to build error_response.
@@ -43,17 +43,21 @@ class QueryCosmosDBError(Exception):
         except ValueError as exc:
             custom_message = "Example custom message."
             raise QueryCosmosDBError(
-                exception_type=exc.__class__.__name__,
+                exception_type=type(exc).__name__,
                 details=exc.message,
                 message=custom_message,
                 status_code=http_client.INTERNAL_SERVER_ERROR,
         )
     """
 
-    exception_type: str
-    details: str
-    message: str
-    status_code: int
+    # attributes are kept in slots, so that no per-instance __dict__ is allocated on raise
+    __slots__ = (
+        "exception_type",
+        "details",
+        "message",
+        "status_code",
+        "_error_response_cache",
+    )
 
     def __init__(
         self,
@@ -66,15 +70,57 @@ class QueryCosmosDBError(Exception):
         self.details = details
         self.message = message
         self.status_code = status_code
-
-        error_response_dict = self.build_error_response()
-        self.error_response = self.convert_to_json(
-            error_response_dict=error_response_dict
-        )
+        self._error_response_cache: Optional[str] = None
 
     def __str__(self) -> str:
         return f"QueryCosmosDBError for passed {self.exception_type} exception"
 
+    @classmethod
+    def from_exception(
+        cls,
+        exc: Any,
+        error_map: Mapping[type, tuple[str, Optional[int]]],
+        **message_fields: str,
+    ) -> "QueryCosmosDBError":
+        """
+        Builds QueryCosmosDBError for an Azure SDK exception, looking up custom message and status code by exception\
+        type. The most specific type found in exception's MRO is used, so subclasses (e.g. CosmosResourceNotFoundError\
+        of CosmosHttpResponseError) can have their own entries.
+
+        Parameters:
+            exc (Any): Caught exception, having message attribute (azure.core.exceptions.AzureError).
+            error_map (Mapping[type, tuple[str, Optional[int]]]): {exception type: (custom message, status code)}.\
+                Status code None means status code of the exception is used. Custom message may contain\
+                {placeholders} filled from message_fields.
+            **message_fields (str): Values of placeholders in custom message.
+
+        Returns:
+            QueryCosmosDBError: Custom error to be raised from exc.
+        """
+        message, status_code = next(
+            error_map[exc_type]
+            for exc_type in type(exc).__mro__
+            if exc_type in error_map
+        )
+        return cls(
+            exception_type=type(exc).__name__,
+            details=exc.message,
+            message=message.format(**message_fields),
+            status_code=exc.status_code if status_code is None else status_code,
+        )
+
+    @property
+    def error_response(self) -> str:
+        """
+        JSON string representing error_response_dict. Built on first access only, as most of QueryCosmosDBErrors\
+        raised internally are never serialised into HTTP response body.
+        """
+        if self._error_response_cache is None:
+            self._error_response_cache = self.convert_to_json(
+                error_response_dict=self.build_error_response()
+            )
+        return self._error_response_cache
+
     def build_error_response(self) -> dict[str, Optional[str] | Optional[int]]:
         """
         Builds error_response from exception info following the format:
@@ -94,7 +140,7 @@ class QueryCosmosDBError(Exception):
 
     def convert_to_json(self, error_response_dict) -> str:
         """
-        Converts error_response_dict to JSON string. Provides fallback in case of TypeError.
+        Converts error_response_dict to JSON string. Values that are not JSON serializable are converted to string.
 
         Returns:
             error_response (str):
@@ -102,29 +148,17 @@ class QueryCosmosDBError(Exception):
                 of error_response_dict (without JSON formatting).
         """
         try:
-            error_response = json.dumps(
-                obj=error_response_dict, indent=4, sort_keys=False, ensure_ascii=False
+            error_response = orjson.dumps(error_response_dict, default=str).decode(
+                encoding="utf-8"
             )
 
-        except TypeError:
-            try:
-                for key, value in error_response_dict.items():
-                    error_response_dict[key] = str(object=value)
-
-                error_response = json.dumps(
-                    obj=error_response_dict,
-                    indent=4,
-                    sort_keys=False,
-                    ensure_ascii=False,
-                )
-
-            except Exception:  # pylint: disable=W0718
-                # catching general exception is intentional here
-                # I can't think of a scenario where this would happen, but just in case.
-                log.warning(
-                    msg=f"Failed to convert error_response_dict to JSON after converting values to string.\
-                        error_response_dict: {error_response_dict}"
-                )
-                error_response = str(object=error_response_dict)
+        except Exception:  # pylint: disable=W0718
+            # catching general exception is intentional here
+            # I can't think of a scenario where this would happen, but just in case.
+            log.warning(
+                "Failed to convert error_response_dict to JSON. error_response_dict: %s",
+                error_response_dict,
+            )
+            error_response = str(object=error_response_dict)
 
         return error_response
@@ -4,6 +4,7 @@ import logging
 import sys
 
 import azure.functions as func
+import orjson
 
 from .custom_error import QueryCosmosDBError
 
@@ -25,14 +26,16 @@ def get_json_from_payload(payload: func.HttpRequest) -> dict:
 
     Raises:
         QueryCosmosDBError:
-            If failed to get request's body or request's body was found to be empty. (ValueError)
+            If failed to get request's body or request's body was found to be empty.\
+                (orjson.JSONDecodeError, a subclass of ValueError)
     """
     try:
-        json_payload = payload.get_json()
+        # raw body bytes are parsed directly, without decoding them to str first (as get_json() does)
+        json_payload = orjson.loads(payload.get_body())
     except ValueError as exc:
         custom_message = "Failed to get request's body or request's body is empty."
         raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
+            exception_type=type(exc).__name__,
             details=str(object=sys.exc_info()),
             message=custom_message,
             status_code=http_client.BAD_REQUEST,
@@ -59,7 +62,7 @@ def get_query_from_payload(json_payload: dict) -> str:
     except KeyError as exc:
         custom_message = "Request's body missing 'query' field."
         raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
+            exception_type=type(exc).__name__,
             details=str(object=sys.exc_info()),
             message=custom_message,
             status_code=http_client.BAD_REQUEST,
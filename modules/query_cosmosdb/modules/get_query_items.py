@@ -1,34 +1,161 @@
 """Module containing functions for querying CosmosDB container with an SQL query provided in HTTP request's body
 and returning query items in json format."""
 
-from collections.abc import Iterable
+from collections.abc import Iterable, MutableMapping
+import functools
 import http.client as http_client
-import json
 import logging
+import re
 import sys
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 
+from azure.core.paging import ItemPaged
 from azure.cosmos import exceptions as cosmos_exceptions
 from azure.cosmos import ContainerProxy
+import orjson
 
 from .custom_error import QueryCosmosDBError
 
-
 log = logging.getLogger(name="log.query_cosmosdb." + __name__)
 
+# queries with these keywords may match more than one partition even if they filter on partition key
+MULTI_PARTITION_KEYWORDS = re.compile(
+    pattern=r"\b(OR|NOT|JOIN|IN|EXISTS)\b", flags=re.IGNORECASE
+)
+FROM_ALIAS = re.compile(pattern=r"\bFROM\s+(\w+)", flags=re.IGNORECASE)
+# partition key literal, parsed only if unambiguous: quoted string without escapes, or integer not followed by
+# decimal point, exponent or further digits; anything else (1.5, 'a\'b', -x) is not routed to a single partition
+PARTITION_KEY_LITERAL = r"(?:'([^'\\]*)'|\"([^\"\\]*)\"|(-?\d+)(?![\w.]))"
+# literal must close the condition, so that e.g. string concatenation (c.pk = 'a' || 'b') is not taken for it
+CONDITION_END = r"(?=\s*(?:\)|$|\b(?:AND|ORDER|GROUP|OFFSET)\b))"
+
+# exception type: (custom message, HTTP status code - None means status code of the exception)
+QUERY_ERRORS: dict[type, tuple[str, Optional[int]]] = {
+    cosmos_exceptions.CosmosResourceNotFoundError: (
+        "CosmosDB resource not found. Check connection string.",
+        None,
+    ),
+    cosmos_exceptions.CosmosClientTimeoutError: (
+        "Request timeout.",
+        http_client.REQUEST_TIMEOUT,
+    ),
+    cosmos_exceptions.CosmosHttpResponseError: (
+        "HTTP Response Error. Please check details.",
+        None,
+    ),
+}
+
+# response body returned when query matched no items, encoded once at import
+EMPTY_QUERY_ITEMS: bytes = orjson.dumps({"message": "Query returned no items."})
+
+
+def extract_partition_key(
+    sql_query: str, partition_key_path: str
+) -> Optional[str | int]:
+    """
+    Extracts partition key value from an SQL query filtering on partition key with equality, e.g.
+    "SELECT c.id FROM c WHERE c.NIP = '9999999999'" for partition_key_path "/NIP". A wrong partition key silently\
+    returns no items, so the value is returned only if the whole literal is parsed unambiguously (see\
+    PARTITION_KEY_LITERAL) and partition key is referenced once; otherwise query runs cross-partition.
+
+    Parameters:
+        sql_query (str): SQL query string.
+        partition_key_path (str): Container's partition key path, e.g. "/NIP".
+
+    Returns:
+        partition_key (Optional[str | int]): Partition key value, or None if query may span more than one partition.
+    """
+    if sql_query.upper().count("SELECT") != 1:
+        return None
+    if MULTI_PARTITION_KEYWORDS.search(sql_query):
+        return None
+
+    alias = FROM_ALIAS.search(sql_query)
+    if alias is None:
+        return None
+
+    # property names are case-sensitive in CosmosDB, so alias and field are matched exactly
+    reference = rf"(?<![\w.])(?-i:{re.escape(alias.group(1))}\.{re.escape(partition_key_path.strip('/'))})\b"
+    if len(re.findall(pattern=reference, string=sql_query)) != 1:
+        return None
+
+    condition = re.search(
+        pattern=rf"\bWHERE\b.*{reference}\s*=\s*{PARTITION_KEY_LITERAL}{CONDITION_END}",
+        string=sql_query,
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    if condition is None:
+        return None
+
+    single_quoted, double_quoted, number = condition.groups()
+    if number is not None:
+        return int(number)
+    return single_quoted if single_quoted is not None else double_quoted
+
+
+@functools.lru_cache(maxsize=128)
+def build_query_options(
+    sql_query: str,
+    partition_key_path: Optional[str],
+    max_item_count: int,
+    max_cache_staleness_ms: Optional[int] = None,
+) -> Mapping[str, Any]:
+    """
+    Builds keyword arguments of ContainerProxy.query_items() for an SQL query. Cached by raw SQL string, as clients\
+    tend to repeat a handful of query templates, so that repeated queries skip the partition key analysis.
+
+    Parameters:
+        sql_query (str): SQL query string.
+        partition_key_path (Optional[str]): Container's partition key path, e.g. "/NIP".
+        max_item_count (int): Maximum number of items per page.
+        max_cache_staleness_ms (Optional[int]): Maximum staleness of results served from CosmosDB integrated cache.\
+            Used only if account is connected through dedicated gateway. Defaults to None (no integrated cache).
+
+    Returns:
+        query_options (Mapping[str, Any]): Read-only mapping of query options, shared between calls.
+    """
+    query_options: dict[str, Any] = {
+        "max_item_count": max_item_count,
+        "populate_query_metrics": False,
+        "enable_cross_partition_query": True,
+    }
+    if max_cache_staleness_ms is not None:
+        query_options["max_integrated_cache_staleness_in_ms"] = max_cache_staleness_ms
+    if partition_key_path is not None:
+        partition_key = extract_partition_key(
+            sql_query=sql_query, partition_key_path=partition_key_path
+        )
+        if partition_key is not None:
+            del query_options["enable_cross_partition_query"]
+            query_options["partition_key"] = partition_key
+
+    return MappingProxyType(query_options)
+
 
 def get_query_items(
-    container: ContainerProxy, sql_query: str
-) -> Iterable[dict[str, Any]]:
+    container: ContainerProxy,
+    sql_query: str,
+    partition_key_path: Optional[str] = None,
+    max_item_count: int = -1,
+    max_cache_staleness_ms: Optional[int] = None,
+) -> ItemPaged[dict[str, Any]]:
     """
     Requests CosmosDB container with an SQL query provided in HTTP request's body and returns query items.
+    If query filters on partition key with equality, it is sent to that single partition only.
 
     Parameters:
         container (ContainerProxy): CosmosDB container client.
         query (str): Query string obtained from get_requests_body().
+        partition_key_path (Optional[str]): Container's partition key path, e.g. "/NIP". Defaults to None.
+        max_item_count (int, optional): Maximum number of items per page. -1 lets CosmosDB fill each page up to\
+            the response size limit, so that the whole result takes fewer round trips than with SDK's default (100).\
+            Defaults to -1.
+        max_cache_staleness_ms (Optional[int], optional): Maximum staleness (ms) of results served from CosmosDB\
+            integrated cache (dedicated gateway only). Defaults to None.
 
     Returns:
-        query_items (Iterable[dict[str, Any]]): object containing query items (invoices) as returned by CosmosDB.
+        query_items (ItemPaged[dict[str, Any]]): object containing query items (invoices) as returned by CosmosDB.
 
     Raises:
         QueryCosmosDBError:
@@ -38,145 +165,226 @@ def get_query_items(
     """
     log.debug(msg="Querying CosmosDB container.")
 
+    query_options = build_query_options(
+        sql_query=sql_query,
+        partition_key_path=partition_key_path,
+        max_item_count=max_item_count,
+        max_cache_staleness_ms=max_cache_staleness_ms,
+    )
+
     try:
         query_items = container.query_items(
             query=sql_query,
-            enable_cross_partition_query=True,
-            headers={
-                "Accept": "application/json",
-                "Content-Type": "application/query+json",
-                "x-ms-documentdb-query-enablecrosspartition": "True",
-                "x-ms-documentdb-isquery": "True",
-            },
+            **query_options,
         )
 
-    except cosmos_exceptions.CosmosResourceNotFoundError as exc:
-        custom_message = "CosmosDB resource not found. Check connection string."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=exc.status_code,  # type: ignore
-        ) from exc
-
-    except cosmos_exceptions.CosmosClientTimeoutError as exc:
-        custom_message = "Request timeout."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=http_client.REQUEST_TIMEOUT,
-        ) from exc
-
-    except cosmos_exceptions.CosmosHttpResponseError as exc:
-        custom_message = "HTTP Response Error. Please check details."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=exc.message,
-            message=custom_message,
-            status_code=exc.status_code,  # type: ignore
+    except tuple(QUERY_ERRORS) as exc:
+        raise QueryCosmosDBError.from_exception(
+            exc=exc, error_map=QUERY_ERRORS
         ) from exc
 
     log.debug(msg="CosmosDB container queried succesfully.")
     return query_items
 
 
-def iterable_to_dict(iterable: Iterable[dict[str, Any]]) -> dict:
+def iterable_to_json(iterable: Iterable[dict[str, Any]]) -> bytes:
     """
-    Converts ItemPaged object to dictionary following the pattern: {ksef_id: invoice_content}.
+    Encodes query items to UTF-8 JSON object following the pattern: {ksef_id: invoice_content}, in a single pass\
+    over the items, as CosmosDB pages arrive. Each item is encoded straight into the output buffer. Items sharing\
+    an id (cross-partition queries may return the same id twice) are written once: ids keep the position of their\
+    first occurrence and the value of their last one, as in a dict built from the items. Only once a duplicate id\
+    appears, items are collected in such a dict and the buffer is written from it at the end.
 
     Parameters:
-        iterable (Iterable[dict[str, Any]]): Iterable object to convert to dictionary.
+        iterable (Iterable[dict[str, Any]]): Query items as returned by get_query_items().
 
     Returns:
-        query_items_dict (dict): Dictionary of query items in format:
-            {id: {query items}.
+        query_items_json (bytes): UTF-8 encoded JSON object {id: {query items}}, or empty bytes if there are no items.
 
     Raises:
         QueryCosmosDBError:
-            If key 'id' not found in iterable. (KeyError)
+            If key 'id' not found in any of the items. (KeyError)
             If upon iterating through first item in iterable, it is found to carry an information on failed query.\
                 (cosmos_exceptions.CosmosHttpResponseError)
+            If failed to convert query item to JSON (orjson.JSONEncodeError).
     """
-    log.debug(msg="Converting query items to dictionary.")
+    log.debug(msg="Converting query items to JSON.")
 
-    query_items_dict = {}
+    buffer = bytearray(b"{")
+    # ids already written to buffer; encoded items by id, set only once a duplicate id appears
+    seen_ids: set[str] = set()
+    encoded_items: Optional[dict[str, bytes]] = None
     try:
         for item in iterable:
-            try:
-                query_items_dict[item["id"]] = item
-            except KeyError as exc:
-                custom_message = f"Key 'id' not found in {item}. Perhaps your query renamed column 'id'?"
+            item_id = item.get("id")
+            if item_id is None:
+                # whole item (possibly a large invoice) is formatted only if debug logging is on
+                log.debug("Query item without 'id': %r", item)
+                custom_message = f"Key 'id' not found in item with keys {list(item)}. Perhaps your query renamed column 'id'?"
                 raise QueryCosmosDBError(
-                    exception_type=exc.__class__.__name__,
-                    details=str(object=sys.exc_info()),
+                    exception_type="KeyError",
+                    details="KeyError: 'id'",
                     message=custom_message,
                     status_code=http_client.BAD_REQUEST,
-                ) from exc
+                )
+            item_id = str(object=item_id)
+
+            if encoded_items is None and item_id in seen_ids:
+                # items written so far are decoded back once; re-assigning a key keeps its position, so last item wins
+                log.debug(
+                    "Duplicate query item id %s, items are collected by id.", item_id
+                )
+                encoded_items = {
+                    key: orjson.dumps(value)
+                    for key, value in orjson.loads(buffer + b"}").items()
+                }
+            if encoded_items is not None:
+                encoded_items[item_id] = orjson.dumps(item)
+                continue
+
+            if seen_ids:
+                buffer += b","
+            seen_ids.add(item_id)
+            buffer += orjson.dumps(item_id)
+            buffer += b":"
+            buffer += orjson.dumps(item)
+
+    # both handlers sit outside the loop, so no exception handler is set up per item
+    except orjson.JSONEncodeError as exc:
+        custom_message = "Failed to convert query item to JSON."
+        raise QueryCosmosDBError(
+            exception_type=type(exc).__name__,
+            details=str(object=sys.exc_info()),
+            message=custom_message,
+            status_code=http_client.INTERNAL_SERVER_ERROR,
+        ) from exc
 
     except cosmos_exceptions.CosmosHttpResponseError as exc:
         custom_message = "HTTP Response Error. Check details for more information."
         raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
+            exception_type=type(exc).__name__,
             details=exc.message,
             message=custom_message,
             status_code=exc.status_code,  # type: ignore
         ) from exc
 
-    log.debug(msg="Query items converted to dictionary succesfully.")
-    return query_items_dict
+    if not seen_ids:
+        return b""
+
+    if encoded_items is not None:
+        buffer = bytearray(b"{")
+        for item_id, encoded_item in encoded_items.items():
+            if len(buffer) > 1:
+                buffer += b","
+            buffer += orjson.dumps(item_id)
+            buffer += b":"
+            buffer += encoded_item
+    buffer += b"}"
 
+    log.debug(msg="Query items converted to JSON succesfully.")
+    return bytes(buffer)
 
-def dict_to_json(query_items_dict: dict) -> str:
+
+def get_query_page(  # pylint: disable=R0913
+    container: ContainerProxy,
+    sql_query: str,
+    page_size: int,
+    continuation_token: Optional[str] = None,
+    partition_key_path: Optional[str] = None,
+    max_cache_staleness_ms: Optional[int] = None,
+) -> bytes:
     """
-    Converts dictionary of invoices to JSON string.
+    Fetches a single page of query items, starting where the page of continuation_token ended. No state is kept\
+    between requests: continuation token returned with the page is passed back by the client to get the next one.
 
     Parameters:
-        query_items_dict (dict): Dictionary of query query_items_list returned by list_to_dict().
+        container (ContainerProxy): CosmosDB container client.
+        sql_query (str): SQL query string.
+        page_size (int): Maximum number of query items in the page.
+        continuation_token (Optional[str], optional): Token returned with previous page. Defaults to None (first page).
+        partition_key_path (Optional[str], optional): Container's partition key path, e.g. "/NIP". Defaults to None.
+        max_cache_staleness_ms (Optional[int], optional): Maximum staleness (ms) of results served from CosmosDB\
+            integrated cache (dedicated gateway only). Defaults to None.
 
     Returns:
-        query_items_json (str): JSON string representing query_items_dict.
+        query_page (bytes): UTF-8 encoded JSON: {"items": {"id_1": {json_1}, ...}, "continuation": token}.\
+            continuation is null on the last page.
 
     Raises:
         QueryCosmosDBError:
-            If failed to convert query items dictionary to JSON string (TypeError).
+            If query fails to run, e.g. continuation token is invalid (cosmos_exceptions.CosmosHttpResponseError).
+            If key 'id' not found in any of the items. (KeyError)
+            If failed to convert query item to JSON (orjson.JSONEncodeError).
     """
-    log.debug(msg="Converting query items dictionary to JSON string.")
+    query_items_raw = get_query_items(
+        container=container,
+        sql_query=sql_query,
+        partition_key_path=partition_key_path,
+        max_item_count=page_size,
+        max_cache_staleness_ms=max_cache_staleness_ms,
+    )
+    pages = query_items_raw.by_page(continuation_token=continuation_token)
 
     try:
-        query_items_json = json.dumps(
-            obj=query_items_dict, indent=4, sort_keys=False, ensure_ascii=False
-        )
-    except TypeError as exc:
-        custom_message = "Failed to convert query items dictionary to JSON string."
-        raise QueryCosmosDBError(
-            exception_type=exc.__class__.__name__,
-            details=str(object=sys.exc_info()),
-            message=custom_message,
-            status_code=http_client.INTERNAL_SERVER_ERROR,
+        page = next(pages, ())
+    except tuple(QUERY_ERRORS) as exc:
+        raise QueryCosmosDBError.from_exception(
+            exc=exc, error_map=QUERY_ERRORS
         ) from exc
 
-    log.debug(msg="Query items dictionary converted to JSON string succesfully.")
-    return query_items_json
+    query_items = iterable_to_json(iterable=page) or b"{}"
+    return b"".join(
+        (
+            b'{"items":',
+            query_items,
+            b',"continuation":',
+            orjson.dumps(pages.continuation_token),
+            b"}",
+        )
+    )
 
 
-def main(
+def main(  # pylint: disable=R0913
     container: ContainerProxy,
     sql_query: str,
-    default_query_items: str = "Query returned no items.",
-) -> str:
+    partition_key_path: Optional[str] = None,
+    max_item_count: int = -1,
+    default_query_items: bytes = EMPTY_QUERY_ITEMS,
+    pretty: bool = False,
+    query_cache: Optional[MutableMapping[tuple[str, str], bytes]] = None,
+    max_cache_staleness_ms: Optional[int] = None,
+    page_size: Optional[int] = None,
+    continuation_token: Optional[str] = None,
+) -> bytes:
     """
     Queries CosmosDB container with an SQL query provided in HTTP request's body and returns query items in json format.
 
     Args:
         container (azure.cosmos.ContainerProxy): a ContainerProxy instance representing the retrieved database.
         sql_query (str): SQL query string in string format.
-        default_query_items (str, optional): default message to be returned if SQL query returned no items.\
-            Defaults to "Query returned no items.".
+        partition_key_path (Optional[str], optional): container's partition key path, e.g. "/NIP". If provided,\
+            queries filtering on partition key are sent to a single partition. Defaults to None.
+        max_item_count (int, optional): maximum number of items per page. -1 (full pages) means fewest round trips\
+            at the cost of bigger RU spike per request; a positive value bounds size of each page. Defaults to -1.
+        default_query_items (bytes, optional): default response body to be returned if SQL query returned no items.\
+            Defaults to EMPTY_QUERY_ITEMS: {"message":"Query returned no items."}.
+        pretty (bool, optional): if True, response body is indented with 2 spaces for human readers (debugging,\
+            tests). Compact JSON is smaller and faster to encode, hence used for machine-to-machine responses.\
+            Defaults to False.
+        query_cache (Optional[MutableMapping[tuple[str, str], bytes]], optional): cache of response bodies keyed by\
+            (container id, SQL query), so that repeated queries (dashboards, polling clients) are answered from\
+            memory. Defaults to None (no caching).
+        max_cache_staleness_ms (Optional[int], optional): maximum staleness (ms) of results served from CosmosDB\
+            integrated cache (dedicated gateway only). Defaults to None.
+        page_size (Optional[int], optional): if provided, only a single page of at most page_size items is returned\
+            (see get_query_page()), which bounds memory and latency of the request. Pages are not cached.\
+            Defaults to None (whole result is returned).
+        continuation_token (Optional[str], optional): token returned with previous page. Defaults to None.
 
     Returns:
-        str: query items (invoices) in a JSON string: {"id_1": {json_1}, "id_2": {json_2}, {...}, "id_n": {json_n}}, if
-            SQL query returned any items. If not, a default message "Query returned no items." is returned.
+        bytes: query items (invoices) in UTF-8 encoded JSON: {"id_1": {json_1}, "id_2": {json_2}, {...},\
+            "id_n": {json_n}}, if SQL query returned any items. If not, default_query_items is returned.\
+            If page_size is provided: {"items": {...}, "continuation": token}.
 
     Raises:
         QueryCosmosDBError:
@@ -186,19 +394,50 @@ def main(
             If key 'id' not found in iterable. (KeyError)
             If upon iterating through first item in iterable, it is found to carry an information on failed query.\
                 (cosmos_exceptions.CosmosHttpResponseError)
-            If failed to convert query items dictionary to JSON string (TypeError).
+            If failed to convert query items to JSON (orjson.JSONEncodeError).
 
     """
-    query_items_raw = get_query_items(container=container, sql_query=sql_query)
+    # pages are never cached; whole results are, if query_cache is provided
+    use_cache = page_size is None and query_cache is not None
+    cache_key = (container.id, sql_query.strip()) if use_cache else None
+    query_items = query_cache.get(cache_key) if use_cache else None
+
+    if page_size is not None:
+        query_items = get_query_page(
+            container=container,
+            sql_query=sql_query,
+            page_size=page_size,
+            continuation_token=continuation_token,
+            partition_key_path=partition_key_path,
+            max_cache_staleness_ms=max_cache_staleness_ms,
+        )
+    elif query_items is not None:
+        log.debug(msg="Query items found in cache.")
+    else:
+        query_items_raw = get_query_items(
+            container=container,
+            sql_query=sql_query,
+            partition_key_path=partition_key_path,
+            max_item_count=max_item_count,
+            max_cache_staleness_ms=max_cache_staleness_ms,
+        )
+
+        # items are encoded page by page; HttpResponse takes a complete body, so it is built in a single buffer
+        query_items = iterable_to_json(iterable=query_items_raw)
 
-    query_items_dict = iterable_to_dict(iterable=query_items_raw)
+        if not query_items:
+            # If query returned no items, return default query_items and status code 200.
+            # can't use http_client.NO_CONTENT (=204) as it is not allowed to return body with 204
+            log.info(msg="Query returned no items.")
+            query_items = default_query_items
 
-    if not query_items_dict:
-        # If query returned no items, return default query_items and status code 200.
-        # can't use http_client.NO_CONTENT (=204) as it is not allowed to return body with 204
-        log.info(msg=default_query_items)
-        return default_query_items
+        if use_cache:
+            query_cache[cache_key] = query_items
 
-    query_items = dict_to_json(query_items_dict=query_items_dict)
+    if pretty:
+        # re-encoding is paid only when explicitly requested
+        query_items = orjson.dumps(
+            orjson.loads(query_items), option=orjson.OPT_INDENT_2
+        )
 
     return query_items
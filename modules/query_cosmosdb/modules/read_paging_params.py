@@ -0,0 +1,79 @@
+"""Reads optional paging parameters of received http request."""
+
+import http.client as http_client
+import logging
+from typing import Optional
+
+import azure.functions as func
+
+from .custom_error import QueryCosmosDBError
+
+log = logging.getLogger(name="log." + __name__)
+
+# header carrying continuation token returned with previous page
+CONTINUATION_HEADER = "x-continuation"
+
+# upper limit of query items returned in a single page
+MAX_PAGE_SIZE = 1000
+
+
+def parse_page_size(page_size: str) -> int:
+    """
+    Converts page_size parameter to integer between 1 and MAX_PAGE_SIZE.
+
+    Args:
+        page_size (str): value of page_size parameter.
+
+    Raises:
+        QueryCosmosDBError: if page_size is not an integer between 1 and MAX_PAGE_SIZE.
+
+    Returns:
+        int: number of query items per page.
+    """
+    if not page_size.isdigit() or not 0 < int(page_size) <= MAX_PAGE_SIZE:
+        message = (
+            f"page_size parameter must be an integer between 1 and {MAX_PAGE_SIZE}."
+        )
+        raise QueryCosmosDBError(
+            exception_type="ValueError",
+            details=f"ValueError: page_size={page_size!r}",
+            message=message,
+            status_code=http_client.BAD_REQUEST,
+        )
+    return int(page_size)
+
+
+def main(req: func.HttpRequest) -> tuple[Optional[int], Optional[str]]:
+    """
+    Reads paging parameters of received http request: page_size (query parameter) and continuation token\
+    (x-continuation header, or continuation query parameter).
+
+    Args:
+        req (azure.functions.HttpRequest): HTTP request sent to Azure Function's endpoint.
+
+    Raises:
+        QueryCosmosDBError: if page_size is not an integer between 1 and MAX_PAGE_SIZE.
+        QueryCosmosDBError: if continuation token is sent without page_size.
+
+    Returns:
+        tuple[Optional[int], Optional[str]]: page size and continuation token. Page size None means paging is off\
+            and the whole result is returned.
+    """
+    page_size = req.params.get("page_size")
+    continuation_token = req.headers.get(CONTINUATION_HEADER) or req.params.get(
+        "continuation"
+    )
+
+    if page_size is None:
+        if continuation_token:
+            message = "Continuation token requires page_size parameter."
+            raise QueryCosmosDBError(
+                exception_type="KeyError",
+                details="KeyError: page_size",
+                message=message,
+                status_code=http_client.BAD_REQUEST,
+            )
+        return None, None
+
+    log.debug("Paging requested, page_size: %s.", page_size)
+    return parse_page_size(page_size=page_size), continuation_token or None
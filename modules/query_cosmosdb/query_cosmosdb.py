@@ -1,15 +1,20 @@
 """Facilitates process of querying CosmosDB container."""
+
 import http.client as http_client
 import logging
-import sys
-from typing import Callable
+from typing import Callable, MutableMapping, Optional
 
 import azure.functions as func
+import orjson
 
-from .modules import get_query_from_body, get_query_items, connection_setup
+from .modules import (
+    get_query_from_body,
+    get_query_items,
+    connection_setup,
+    read_paging_params,
+)
 from .modules.custom_error import QueryCosmosDBError
 
-
 log = logging.getLogger(name="log." + __name__)
 
 
@@ -19,9 +24,15 @@ def main(  # pylint: disable=R0913
     cosmosdb_database_id: str,
     cosmosdb_container_id: str,
     exception_handler: Callable,
+    cosmosdb_partition_key_path: Optional[str] = None,
+    cosmosdb_consistency_level: Optional[str] = None,
+    max_item_count: int = -1,
+    pretty: bool = False,
+    query_cache: Optional[MutableMapping[tuple[str, str], bytes]] = None,
+    max_cache_staleness_ms: Optional[int] = None,
     default_body: str = "Unexpected error, please contact function administrator.",
     default_status_code: int = http_client.INTERNAL_SERVER_ERROR,
-) -> tuple[str, int]:
+) -> tuple[str | bytes, int]:
     """
     Queries CosmosDB container with an SQL query provided in HTTP request's body and returns query items in json format.
 
@@ -30,21 +41,36 @@ def main(  # pylint: disable=R0913
         cosmosdb_connection_string (str): CosmosDB connection string.
         cosmosdb_database_id (str): CosmosDB database ID (name).
         cosmosdb_container_id (str): CosmosDB container ID (name).
+        exception_handler (Callable): function that handles exceptions.
+        cosmosdb_partition_key_path (Optional[str], optional): CosmosDB container's partition key path, e.g. "/NIP".\
+            Lets queries filtering on partition key skip cross-partition fan-out. Defaults to None.
+        cosmosdb_consistency_level (Optional[str], optional): Consistency level of CosmosDB client, e.g. "Session".\
+            Defaults to None (account's default consistency level).
+        max_item_count (int, optional): Maximum number of query items per page fetched from CosmosDB.\
+            -1 lets CosmosDB fill pages up to response size limit (fewest round trips, for large scans);\
+            a positive value bounds memory and RU charge of each page. Defaults to -1.
+        pretty (bool, optional): If True, query items are returned as indented JSON, for human readers.\
+            Defaults to False (compact JSON).
+        query_cache (Optional[MutableMapping[tuple[str, str], bytes]], optional): Cache of query results keyed by\
+            (container id, SQL query). Defaults to None (every query is sent to CosmosDB).
+        max_cache_staleness_ms (Optional[int], optional): Maximum staleness (ms) of results served from CosmosDB\
+            integrated cache, for accounts connected through dedicated gateway. Defaults to None.
         default_body (str, optional): Default message, changed in course of execution od the function.
         default_status_code (int, optional): HTTP status code OK (200). Default value, 200, is returned unchanged\
             if no exception encountered.
 
     Returns:
-        tuple (str,int):
-            query_items (str):
+        tuple (str | bytes,int):
+            query_items (str | bytes):
                 query items (invoices) in a JSON string: {"id_1": {json_1}, "id_2": {json_2}, {...}, "id_n": {json_n}},
-                if SQL query returned any items. If not, a default message "Query returned no items." is returned.
+                if SQL query returned any items. If not, {"message":"Query returned no items."} is returned.
             status_code (int):
                 HTTP status code OK (200).
 
     Raises:
         QueryCosmosDBError:
             If failed to get request's body or request's body was found to be empty (in get_query_from_body).
+            If page_size parameter is invalid or continuation token is sent without it (in read_paging_params).
             If failed to connect with host declared in AccountEndpoint (in setup_cosmos_client).
             If CosmosDB host URL is invalid (in setup_cosmos_client).
             If request times out (in setup_cosmos_client).
@@ -63,23 +89,34 @@ def main(  # pylint: disable=R0913
 
     try:
         sql_query = get_query_from_body.main(req=req)
+        page_size, continuation_token = read_paging_params.main(req=req)
 
         container = connection_setup.main(
             connection_string=cosmosdb_connection_string,
             database_id=cosmosdb_database_id,
             container_id=cosmosdb_container_id,
+            consistency_level=cosmosdb_consistency_level,
         )
 
-        body = get_query_items.main(container=container, sql_query=sql_query)
+        body = get_query_items.main(
+            container=container,
+            sql_query=sql_query,
+            partition_key_path=cosmosdb_partition_key_path,
+            max_item_count=max_item_count,
+            pretty=pretty,
+            query_cache=query_cache,
+            max_cache_staleness_ms=max_cache_staleness_ms,
+            page_size=page_size,
+            continuation_token=continuation_token,
+        )
         status_code = http_client.OK
 
     except QueryCosmosDBError as exc:
         body, status_code = exception_handler(exc=exc)
 
-    except Exception:  # pylint: disable=W0718
+    except Exception as exc:  # pylint: disable=W0718
         # if unhandled exception, return default HTTP response with error details and use default status code (500)
-        exc_type, exc_value, exc_traceback = sys.exc_info()  # pylint: disable=W0612
-        body = str(object={"exception": exc_type.__name__, "message": exc_value})  # type: ignore
+        body = orjson.dumps({"exception": type(exc).__name__, "message": str(exc)})
         status_code = http_client.INTERNAL_SERVER_ERROR
         # "except Exceptions" is enough to know there is an exception with a name and a value
 
@@ -7,22 +7,37 @@ from connection_setup_tests import (
     TestSetupCosmosClient,
     TestSetupDatabaseClient,
     TestSetupContainerClient,
-    TestMain,
+    TestMain as TestConnectionSetupMain,
 )
 from exception_handler_tests import TestHandleException
-from function_app_tests import TestFunctionApp
+from function_app_tests import TestFunctionApp, TestDownloadBlobApp
+from download_blob_tests import (
+    TestParseInvoiceIds,
+    TestValidateInvoiceIds,
+    TestGetXmlBytesBatch,
+    TestCreateZip,
+    TestMain as TestDownloadBlobMain,
+    TestGetContentType,
+)
 from query_cosmosDB_tests import (
-    TestIterableToDict,
-    TestDictToJson,
+    TestExtractPartitionKey,
+    TestIterableToJson,
     TestGetQueryItems,
-    TestMain,
+    TestMain as TestGetQueryItemsMain,
+)
+from get_query_from_body_tests import (
+    TestGetJSONFromPayload,
+    TestGetQueryFromPayload,
+    TestMain as TestGetQueryFromBodyMain,
 )
-from get_query_from_body_tests import TestGetRequestsBody, TestMain
 from query_cosmosDB_error_tests import TestQueryCosmosDBError
+from parse_xsl_tests import TestTransformStylXlsToXLST
 
 if __name__ == "__main__":
     # turn off logs for testing
-    context.turn_off_logging(module="modules.get_query_from_body")
-    context.turn_off_logging(module="modules.utilities.exception_handler")
+    context.turn_off_logging(
+        module="modules.query_cosmosdb.modules.get_query_from_body"
+    )
+    context.turn_off_logging(module="utilities.exception_handler")
 
     unittest.main()
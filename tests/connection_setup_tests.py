@@ -1,218 +1,273 @@
+import copy
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, Mock, patch
 import http.client as http_client
 
 from azure.core import exceptions as azure_exc
-from azure.cosmos import exceptions as cosmos_exc, ContainerProxy
+from azure.cosmos import (
+    exceptions as cosmos_exc,
+    ContainerProxy,
+    CosmosClient,
+    DatabaseProxy,
+)
 
 import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
-from modules.connection_setup import (
+from modules.query_cosmosdb.modules.connection_setup import (
+    create_container_client,
     setup_container_client,
     setup_cosmos_client,
     setup_database_client,
     main,
 )
-from modules.utilities.query_cosmosDB_error import QueryCosmosDBError
+from modules.query_cosmosdb.modules.custom_error import QueryCosmosDBError
 
 
 # turn off logs for testing
-context.turn_off_logging(module="modules.connection_setup")
+context.turn_off_logging(module="modules.query_cosmosdb.modules.connection_setup")
 
 
 class TestSetupCosmosClient(unittest.TestCase):
+    # (exception, expected status code, message, exception type, details)
+    # exceptions are built once per class and re-raised by every run of the case
+    CASES = (
+        (
+            azure_exc.ServiceRequestError(message="Failed to connect."),
+            http_client.NOT_FOUND,
+            "Failed to connect with host declared in AccountEndpoint. Check connection string.",
+            "ServiceRequestError",
+            "Failed to connect.",
+        ),
+        (
+            cosmos_exc.CosmosResourceNotFoundError(
+                message="Invalid host URL.", status_code=http_client.UNAUTHORIZED
+            ),
+            None,
+            "CosmosDB host URL is invalid. Check connection string.",
+            "CosmosResourceNotFoundError",
+            "Status code: 401\nInvalid host URL.",
+        ),
+        (
+            cosmos_exc.CosmosClientTimeoutError(),
+            http_client.REQUEST_TIMEOUT,
+            "Request timeout.",
+            "CosmosClientTimeoutError",
+            "The request failed to complete within the given timeout.",
+        ),
+        (
+            cosmos_exc.CosmosHttpResponseError(
+                message="Unauthorized request.", status_code=http_client.UNAUTHORIZED
+            ),
+            None,
+            "Unauthorized. The input authorization token can't serve the request. Check connection string.",
+            "CosmosHttpResponseError",
+            "Status code: 401\nUnauthorized request.",
+        ),
+    )
+
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
         cls.exception = QueryCosmosDBError
         cls.connection_string = "mock_connection_string"
+        # one patcher for the whole class, instead of building a new MagicMock for every test
+        cls._cosmos_patcher = patch(
+            "modules.query_cosmosdb.modules.connection_setup.CosmosClient"
+        )
+        cls.mock_cosmos_client = cls._cosmos_patcher.start()
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        cls._cosmos_patcher.stop()
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def setUp(self) -> None:
+        self.mock_cosmos_client.reset_mock(return_value=True, side_effect=True)
 
-    @patch("modules.connection_setup.CosmosClient")
-    def execute_assert_raises(self, mock_cosmos_client) -> None:
+    def execute_assert_raises(self) -> None:
         """Helper function to execute the assertRaises block."""
 
-        mock_cosmos_client.from_connection_string.side_effect = self.exc
+        self.mock_cosmos_client.from_connection_string.side_effect = self.exc
         with self.assertRaises(expected_exception=self.exception) as cm:
             setup_cosmos_client(connection_string=self.connection_string)
 
-            self.assertEqual(
-                first=cm.exception.status_code, second=self.expected_status_code
-            )
-            self.assertEqual(
-                first=cm.exception.message,
-                second=self.expected_message,
-            )
-            self.assertEqual(
-                first=cm.exception.exception_type,
-                second=self.expected_exception_type,
-            )
-            self.assertEqual(first=cm.exception.details, second=self.expected_details)
+        self.assertEqual(
+            first=cm.exception.status_code, second=self.expected_status_code
+        )
+        self.assertEqual(
+            first=cm.exception.message,
+            second=self.expected_message,
+        )
+        self.assertEqual(
+            first=cm.exception.exception_type,
+            second=self.expected_exception_type,
+        )
+        self.assertEqual(first=cm.exception.details, second=self.expected_details)
 
-    @patch("modules.connection_setup.CosmosClient")
-    def test_successful_connection(self, mock_cosmos_client) -> None:
+    def test_successful_connection(self) -> None:
         """Test the function with a successful connection."""
 
-        mock_client = MagicMock()
-        mock_cosmos_client.from_connection_string.return_value = mock_client
+        mock_client = Mock(spec_set=CosmosClient)
+        self.mock_cosmos_client.from_connection_string.return_value = mock_client
         result = setup_cosmos_client(connection_string=self.connection_string)
 
         self.assertEqual(first=result, second=mock_client)
-
-    def test_invalid_connection_string(self) -> None:
-        """Test the function with an invalid connection string."""
-
-        exc_message = "Failed to connect."
-        self.exc = azure_exc.ServiceRequestError(message=exc_message)
-        self.expected_message = "Failed to connect with host declared in AccountEndpoint. Check connection string."
-        self.expected_exception_type = "ServiceRequestError"
-        self.expected_details = exc_message
-        self.expected_status_code = http_client.NOT_FOUND
-
-        self.execute_assert_raises()
-
-    def test_invalid_host_url(self) -> None:
-        """Test the function with an invalid host URL."""
-
-        exc_status_code = http_client.UNAUTHORIZED
-        exc_message = "Invalid host URL."
-        self.exc = cosmos_exc.CosmosResourceNotFoundError(
-            message=exc_message,
-            status_code=exc_status_code,
-        )
-        self.expected_message = "CosmosDB host URL is invalid. Check connection string."
-        self.expected_exception_type = "CosmosResourceNotFoundError"
-        self.expected_details = "Status code: 0\nInvalid host URL."
-        self.expected_status_code = exc_status_code
-
-        self.execute_assert_raises()
-
-    def test_request_timeout(self) -> None:
-        """Test the function with a request timeout."""
-
-        self.exc = cosmos_exc.CosmosClientTimeoutError()
-        self.expected_status_code = http_client.REQUEST_TIMEOUT
-        self.expected_message = "Request timeout."
-        self.expected_exception_type = "CosmosClientTimeoutError"
-        self.expected_details = (
-            "Client operation failed to complete within specified timeout."
+        # account's default consistency level applies, unless COSMOSDB_CONSISTENCY_LEVEL is set
+        self.assertIsNone(
+            self.mock_cosmos_client.from_connection_string.call_args.kwargs[
+                "consistency_level"
+            ]
         )
 
-        self.execute_assert_raises()
+    def test_error_paths(self) -> None:
+        """Test the function with exceptions raised by Azure SDK, one subTest per case in CASES."""
 
-    def test_unauthorized_request(self) -> None:
-        """Test the function with an unauthorized request."""
+        for exc, status_code, message, exception_type, details in self.CASES:
+            with self.subTest(case=message):
+                self.exc = exc
+                # None means status code of the raised exception is expected
+                self.expected_status_code = (
+                    self.exc.status_code if status_code is None else status_code
+                )
+                self.expected_message = message
+                self.expected_exception_type = exception_type
+                self.expected_details = details
 
-        exc_status_code = http_client.UNAUTHORIZED
-        exc_message = "Unauthorized request."
-
-        self.exc = cosmos_exc.CosmosHttpResponseError(
-            message=exc_message,
-            status_code=exc_status_code,
-        )
-        self.expected_message = "Unauthorized. The input authorization token can't serve the request. Check connection string."
-        self.expected_exception_type = "CosmosHttpResponseError"
-        self.expected_details = "Status code: 401\nUnauthorized request."
-        self.expected_status_code = self.exc.status_code
-
-        self.execute_assert_raises()
+                self.execute_assert_raises()
 
 
 class TestSetupDatabaseClient(unittest.TestCase):
+    # (exception, expected status code, message, exception type, details)
+    # exceptions are built once per class and re-raised by every run of the case
+    CASES = (
+        (
+            cosmos_exc.CosmosResourceNotFoundError(message="Database not found."),
+            None,
+            "CosmosDB database mock_database_id was not found.",
+            "CosmosResourceNotFoundError",
+            "Status code: 0\nDatabase not found.",
+        ),
+        (
+            cosmos_exc.CosmosClientTimeoutError(),
+            http_client.REQUEST_TIMEOUT,
+            "Request timeout.",
+            "CosmosClientTimeoutError",
+            "The request failed to complete within the given timeout.",
+        ),
+    )
+
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
         cls.database_id = "mock_database_id"
+        cls._cosmos_patcher = patch(
+            "modules.query_cosmosdb.modules.connection_setup.CosmosClient"
+        )
+        cls.mock_cosmos_client = cls._cosmos_patcher.start()
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        cls._cosmos_patcher.stop()
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
-    @patch("modules.connection_setup.CosmosClient")
-    def execute_assert_raises(self, mock_cosmos_client) -> None:
+    def setUp(self) -> None:
+        self.mock_cosmos_client.reset_mock(return_value=True, side_effect=True)
+
+    def execute_assert_raises(self) -> None:
         """Helper function to execute the assertRaises block."""
 
         expected_exception = QueryCosmosDBError
-        mock_client = MagicMock()
+        mock_client = Mock(spec_set=CosmosClient)
         mock_client.get_database_client.side_effect = self.exc
-        mock_cosmos_client.return_value = mock_client
+        self.mock_cosmos_client.return_value = mock_client
 
         with self.assertRaises(expected_exception=expected_exception) as cm:
             setup_database_client(client=mock_client, database_id=self.database_id)
 
-            self.assertEqual(
-                first=cm.exception.status_code, second=self.expected_status_code
-            )
-            self.assertEqual(
-                first=cm.exception.message,
-                second=self.expected_message,
-            )
-            self.assertEqual(
-                first=cm.exception.exception_type, second=self.expected_exception_type
-            )
-            self.assertEqual(first=cm.exception.details, second=self.expected_details)
+        self.assertEqual(
+            first=cm.exception.status_code, second=self.expected_status_code
+        )
+        self.assertEqual(
+            first=cm.exception.message,
+            second=self.expected_message,
+        )
+        self.assertEqual(
+            first=cm.exception.exception_type, second=self.expected_exception_type
+        )
+        self.assertEqual(first=cm.exception.details, second=self.expected_details)
 
-    @patch("modules.connection_setup.CosmosClient")
-    def test_successful_connection(self, mock_cosmos_client) -> None:
+    def test_successful_connection(self) -> None:
         """Test the function with a successful connection."""
 
-        mock_database = MagicMock()
-        mock_client = MagicMock()
+        mock_database = Mock(spec_set=DatabaseProxy)
+        mock_client = Mock(spec_set=CosmosClient)
         mock_client.get_database_client.return_value = mock_database
-        mock_cosmos_client.return_value = mock_client
+        self.mock_cosmos_client.return_value = mock_client
 
         result = setup_database_client(client=mock_client, database_id=self.database_id)
 
         self.assertEqual(first=result, second=mock_database)
 
-    def test_invalid_database_id(self) -> None:
-        """Test the function with an invalid database ID."""
+    def test_error_paths(self) -> None:
+        """Test the function with exceptions raised by Azure SDK, one subTest per case in CASES."""
 
-        self.exc = cosmos_exc.CosmosResourceNotFoundError(message="Database not found.")
-        self.expected_message = "CosmosDB database invalid_database_id was not found."
-        self.expected_exception_type = "CosmosResourceNotFoundError"
-        self.expected_details = "Status code: 0\nDatabase not found."
-        self.expected_status_code = self.exc.status_code
+        for exc, status_code, message, exception_type, details in self.CASES:
+            with self.subTest(case=message):
+                self.exc = exc
+                # None means status code of the raised exception is expected
+                self.expected_status_code = (
+                    self.exc.status_code if status_code is None else status_code
+                )
+                self.expected_message = message
+                self.expected_exception_type = exception_type
+                self.expected_details = details
 
-        self.execute_assert_raises()
-
-    def test_request_timeout(self) -> None:
-        """Test the function with a request timeout."""
-
-        self.exc = cosmos_exc.CosmosClientTimeoutError()
-        self.expected_message = "Request timeout."
-        self.expected_exception_type = "CosmosClientTimeoutError"
-        self.expected_details = (
-            "Client operation failed to complete within specified timeout."
-        )
-        self.expected_status_code = http_client.REQUEST_TIMEOUT
-
-        self.execute_assert_raises()
+                self.execute_assert_raises()
 
 
 class TestSetupContainerClient(unittest.TestCase):
+    # (exception, expected status code, message, exception type, details)
+    # exceptions are built once per class and re-raised by every run of the case
+    CASES = (
+        (
+            cosmos_exc.CosmosResourceNotFoundError(message="Container not found."),
+            None,
+            "CosmosDB container mock_container_id was not found.",
+            "CosmosResourceNotFoundError",
+            "Status code: 0\nContainer not found.",
+        ),
+        (
+            cosmos_exc.CosmosClientTimeoutError(),
+            http_client.REQUEST_TIMEOUT,
+            "Request timeout.",
+            "CosmosClientTimeoutError",
+            "The request failed to complete within the given timeout.",
+        ),
+    )
+
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+        cls._database_proxy_patcher = patch(
+            "modules.query_cosmosdb.modules.connection_setup.DatabaseProxy"
+        )
+        cls.mock_database_proxy = cls._database_proxy_patcher.start()
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        cls._database_proxy_patcher.stop()
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def setUp(self) -> None:
+        self.mock_database_proxy.reset_mock(return_value=True, side_effect=True)
 
-    @patch("modules.connection_setup.DatabaseProxy")
-    def execute_assert_raises(self, mock_database_proxy) -> None:
+    def execute_assert_raises(self) -> None:
         """Helper function to execute the assertRaises block."""
 
         expected_exception = QueryCosmosDBError
         container_id = "mock_container_id"
-        mock_database = MagicMock()
+        mock_database = Mock(spec_set=DatabaseProxy)
         mock_database.get_container_client.side_effect = self.exc
-        mock_database_proxy.return_value = mock_database
+        self.mock_database_proxy.return_value = mock_database
 
         with self.assertRaises(expected_exception=expected_exception) as cm:
             setup_container_client(
@@ -220,31 +275,30 @@ class TestSetupContainerClient(unittest.TestCase):
                 container_id=container_id,
             )
 
-            self.assertEqual(
-                first=cm.exception.status_code,
-                second=self.expected_status_code,
-            )
-            self.assertEqual(
-                first=cm.exception.message,
-                second=self.expected_message,
-            )
-            self.assertEqual(
-                first=cm.exception.exception_type,
-                second=self.expected_exception_type,
-            )
-            self.assertEqual(
-                first=cm.exception.details,
-                second=self.expected_details,
-            )
+        self.assertEqual(
+            first=cm.exception.status_code,
+            second=self.expected_status_code,
+        )
+        self.assertEqual(
+            first=cm.exception.message,
+            second=self.expected_message,
+        )
+        self.assertEqual(
+            first=cm.exception.exception_type,
+            second=self.expected_exception_type,
+        )
+        self.assertEqual(
+            first=cm.exception.details,
+            second=self.expected_details,
+        )
 
-    @patch("modules.connection_setup.DatabaseProxy")
-    def test_successful_connection(self, mock_database_proxy) -> None:
+    def test_successful_connection(self) -> None:
         """Test the function with a successful connection."""
 
         container_id = "mock_container_id"
-        mock_container = MagicMock()
-        mock_database = MagicMock()
-        mock_database_proxy.return_value = mock_database
+        mock_container = Mock(spec_set=ContainerProxy)
+        mock_database = Mock(spec_set=DatabaseProxy)
+        self.mock_database_proxy.return_value = mock_database
         mock_database.get_container_client.return_value = mock_container
 
         test_result = setup_container_client(
@@ -253,65 +307,69 @@ class TestSetupContainerClient(unittest.TestCase):
 
         self.assertEqual(first=mock_container, second=test_result)
 
-    def test_invalid_database_id(self) -> None:
-        """Test the function with an invalid database ID."""
-
-        self.exc = cosmos_exc.CosmosResourceNotFoundError(
-            message="Container not found."
-        )
-        self.expected_message = "CosmosDB container mock_container_id was not found."
-        self.expected_exception_type = "CosmosResourceNotFoundError"
-        self.expected_details = "Status code: 0\nContainer not found."
-        self.expected_status_code = self.exc.status_code
+    def test_error_paths(self) -> None:
+        """Test the function with exceptions raised by Azure SDK, one subTest per case in CASES."""
 
-        self.execute_assert_raises()
+        for exc, status_code, message, exception_type, details in self.CASES:
+            with self.subTest(case=message):
+                self.exc = exc
+                # None means status code of the raised exception is expected
+                self.expected_status_code = (
+                    self.exc.status_code if status_code is None else status_code
+                )
+                self.expected_message = message
+                self.expected_exception_type = exception_type
+                self.expected_details = details
 
-    def test_request_timeout(self) -> None:
-        """Test the function with a request timeout."""
-
-        self.exc = cosmos_exc.CosmosClientTimeoutError()
-        self.expected_message = "Request timeout."
-        self.expected_exception_type = "CosmosClientTimeoutError"
-        self.expected_details = (
-            "Client operation failed to complete within specified timeout."
-        )
-        self.expected_status_code = http_client
-
-        self.execute_assert_raises()
+                self.execute_assert_raises()
 
 
 class TestMain(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+        cls._patchers = {
+            name: patch(f"modules.query_cosmosdb.modules.connection_setup.{name}")
+            for name in (
+                "setup_cosmos_client",
+                "setup_database_client",
+                "setup_container_client",
+                "log",
+            )
+        }
+        cls.mocks = {name: patcher.start() for name, patcher in cls._patchers.items()}
+        # spec'd mock walks ContainerProxy once; tests get shallow copies (child mocks are shared, don't configure them)
+        cls._container_proxy_template = MagicMock(spec=ContainerProxy)
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
-
-    @patch("modules.connection_setup.setup_cosmos_client")
-    @patch("modules.connection_setup.setup_database_client")
-    @patch("modules.connection_setup.setup_container_client")
-    @patch("modules.connection_setup.log")
-    def test_valid_input(
-        self,
-        mock_logger,
-        setup_container_client,
-        setup_database_client,
-        setup_cosmos_client,
-    ) -> None:
+        for patcher in cls._patchers.values():
+            patcher.stop()
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def setUp(self) -> None:
+        for mock in self.mocks.values():
+            mock.reset_mock(return_value=True, side_effect=True)
+        # container client is cached across calls of main; every test starts with an empty cache
+        create_container_client.cache_clear()
+
+    def test_valid_input(self) -> None:
         """Test the function with valid input."""
 
+        mock_logger = self.mocks["log"]
+        setup_cosmos_client = self.mocks["setup_cosmos_client"]
+        setup_database_client = self.mocks["setup_database_client"]
+        setup_container_client = self.mocks["setup_container_client"]
+
         connection_string = "mock_connection_string"
         database_id = "mock_database_id"
         container_id = "mock_container_id"
 
-        mock_container_proxy = MagicMock(spec=ContainerProxy)
+        mock_container_proxy = copy.copy(self._container_proxy_template)
 
         mock_logger.info.return_value = None
-        setup_cosmos_client.return_value = MagicMock()
-        setup_database_client.return_value = MagicMock()
+        setup_cosmos_client.return_value = Mock(spec_set=CosmosClient)
+        setup_database_client.return_value = Mock(spec_set=DatabaseProxy)
         setup_container_client.return_value = mock_container_proxy
 
         expected_result = mock_container_proxy
@@ -324,6 +382,56 @@ class TestMain(unittest.TestCase):
 
         self.assertEqual(first=test_result, second=expected_result)
 
+    def test_reusing_container_client(self) -> None:
+        """Test the function returning cached container client on second call, without setting it up again."""
+
+        self.mocks["setup_container_client"].return_value = copy.copy(
+            self._container_proxy_template
+        )
+        kwargs = {
+            "connection_string": "mock_connection_string",
+            "database_id": "mock_database_id",
+            "container_id": "mock_container_id",
+        }
+
+        first_result = main(**kwargs)
+        second_result = main(**kwargs)
+
+        self.assertIs(first_result, second_result)
+        for name in (
+            "setup_cosmos_client",
+            "setup_database_client",
+            "setup_container_client",
+        ):
+            self.assertEqual(first=self.mocks[name].call_count, second=1)
+
+    def test_not_caching_failed_setup(self) -> None:
+        """Test the function setting up container client again, if previous setup failed."""
+
+        mock_container_proxy = copy.copy(self._container_proxy_template)
+        self.mocks["setup_cosmos_client"].side_effect = [
+            QueryCosmosDBError(
+                exception_type="ServiceRequestError",
+                details="mock details",
+                message="mock message",
+                status_code=http_client.NOT_FOUND,
+            ),
+            Mock(spec_set=CosmosClient),
+        ]
+        self.mocks["setup_container_client"].return_value = mock_container_proxy
+        kwargs = {
+            "connection_string": "mock_connection_string",
+            "database_id": "mock_database_id",
+            "container_id": "mock_container_id",
+        }
+
+        with self.assertRaises(expected_exception=QueryCosmosDBError):
+            main(**kwargs)
+        test_result = main(**kwargs)
+
+        self.assertEqual(first=test_result, second=mock_container_proxy)
+        self.assertEqual(first=self.mocks["setup_cosmos_client"].call_count, second=2)
+
     def test_with_invalid_input(self) -> None:
         """There's no test to be done. Main function is a wrapper for other functions.
         Invalid input into the module will be handled by try/except blocks in called functions.
@@ -4,11 +4,12 @@
 Mocks environment variables and inserts main app folder to PATH.
 Turns off logging for tested modules.
 """
+import importlib
 import logging
 import os
 from pathlib import PurePath as path
 import sys
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 function_app_path = str(path(__file__).parents[1])
 
@@ -23,14 +24,45 @@ sys.path.insert(0, function_app_path)
 os.environ["AZURE_COSMOSDB_CONNECTION_STRING"] = "mock_connection_string"
 os.environ["DATABASE_ID"] = "mock_database_id"
 os.environ["CONTAINER_ID"] = "mock_container_id"
+# names read by utilities.setup
+os.environ["COSMOSDB_CONNECTION_STRING"] = "mock_connection_string"
+os.environ["COSMOSDB_DATABASE_ID"] = "mock_database_id"
+os.environ["COSMOSDB_CONTAINER_ID"] = "mock_container_id"
+os.environ["BLOB_CONNECTION_STRING"] = "mock_blob_connection_string"
+os.environ["BLOB_CONTAINER_NAME"] = "mock_blob_container_name"
+
+# function_app compiles styl.xsl (its xsl:import is fetched from crd.gov.pl) and builds its BLOB container client
+# when imported. It is imported here once, with both patched, so collection needs neither network nor Azure, and
+# test modules doing "import function_app" get it from sys.modules. WeasyPrint is imported by create_pdf on first
+# pdf request only, so its native libraries are not needed either.
+# Test files must "import context" before "import function_app".
+if "function_app" not in sys.modules:
+    with patch(
+        "utilities.parse_xsl.transform_styl_xls_to_XLST", return_value=MagicMock()
+    ), patch(
+        "modules.download_blob.modules.download_xml.create_blob_container_client",
+        return_value=MagicMock(),
+    ):
+        import function_app
+
+
+# banners of test classes are printed only with TEST_VERBOSE=1
+TEST_VERBOSE = os.environ.get("TEST_VERBOSE") == "1"
+
+
+def banner(msg: str) -> None:
+    """Prints test class banner, if TEST_VERBOSE environment variable is set to 1."""
+    if TEST_VERBOSE:
+        print(msg)
 
 
 def turn_off_logging(module: str) -> None:
-    """Turns off logging for tested modules."""
-    logger_name = module + ".log"
-    with patch(logger_name).start() as mock_logger:
-        mock_logger = mock_logger
-        mock_logger.setLevel.return_value = None
+    """Turns off logging for tested modules, by disabling module's logger (no mock is created)."""
+    tested_module = importlib.import_module(name=module)
+    if hasattr(tested_module, "log"):
+        tested_module.log.disabled = True
+        tested_module.log.setLevel(logging.CRITICAL + 1)
 
 
-turn_off_logging(module="modules.utilities.exception_handler")
+turn_off_logging(module="utilities.exception_handler")
+logging.disable(level=logging.CRITICAL)
@@ -0,0 +1,283 @@
+import http.client as http_client
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+import zipfile
+
+from azure.functions import HttpRequest
+import orjson
+
+import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
+from modules.download_blob import download_blob
+from modules.download_blob.modules import create_zip, download_xml, read_params
+from modules.download_blob.modules.custom_error import DownloadBlobError
+from utilities.exception_handler import handle_cosmosdb_error
+
+# turn off logs for testing
+context.turn_off_logging(module="modules.download_blob.download_blob")
+context.turn_off_logging(module="modules.download_blob.modules.download_xml")
+context.turn_off_logging(module="modules.download_blob.modules.read_params")
+context.turn_off_logging(module="modules.download_blob.modules.custom_error")
+
+
+def make_request(params: dict[str, str]) -> HttpRequest:
+    """Builds GET request to downloadblob endpoint with given query parameters."""
+    return HttpRequest(method="GET", body=b"", url="url", params=params)
+
+
+class TestParseInvoiceIds(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def test_splitting_stripping_and_deduplicating(self) -> None:
+        """Tests the function returning unique invoice ids in order of first occurrence."""
+        actual_outcome = read_params.parse_invoice_ids(invoice_ids="b-2, a-1,b-2 ,c-3")
+
+        self.assertEqual(first=actual_outcome, second=["b-2", "a-1", "c-3"])
+
+    def test_reading_batch_params(self) -> None:
+        """Tests main reading invoice_ids (as a list) and file_format of batch request."""
+        req = make_request(params={"invoice_ids": "a-1,b-2", "file_format": "xml"})
+
+        actual_outcome = read_params.main(req=req)
+
+        self.assertEqual(
+            first=actual_outcome,
+            second={"invoice_ids": ["a-1", "b-2"], "file_format": "xml"},
+        )
+
+
+class TestValidateInvoiceIds(unittest.TestCase):
+    # invoice ids rejected with 400 status code: anything but 1-64 letters, digits and hyphens
+    INVALID_IDS = ("", "a_1", "a 1", "../a", "a-1\n", "a" * 65)
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def assert_bad_request(self, params: dict[str, str]) -> None:
+        """Asserts read_params.main rejecting request with given query parameters with 400 status code."""
+        with self.assertRaises(expected_exception=DownloadBlobError) as context_manager:
+            read_params.main(req=make_request(params=params))
+        self.assertEqual(
+            first=context_manager.exception.status_code,
+            second=http_client.BAD_REQUEST,
+        )
+
+    def test_accepting_ksef_invoice_id(self) -> None:
+        """Tests main accepting invoice id made of letters, digits and hyphens."""
+        invoice_id = "5265877635-20230510-AB12CD34EF56-7A"
+
+        actual_outcome = read_params.main(
+            req=make_request(params={"invoice_id": invoice_id, "file_format": "xml"})
+        )
+
+        self.assertEqual(first=actual_outcome["invoice_id"], second=invoice_id)
+
+    def test_rejecting_invalid_invoice_id(self) -> None:
+        """Tests main rejecting invalid invoice_id with 400 status code."""
+        for invoice_id in self.INVALID_IDS:
+            with self.subTest(invoice_id=invoice_id):
+                self.assert_bad_request(
+                    params={"invoice_id": invoice_id, "file_format": "xml"}
+                )
+
+    def test_rejecting_invalid_id_in_batch(self) -> None:
+        """Tests main rejecting batch with any invalid invoice id with 400 status code. Ids of batch are stripped\
+        of surrounding whitespace, so "a-1\\n" is valid there."""
+        for invoice_id in self.INVALID_IDS:
+            if invoice_id.strip() != invoice_id:
+                continue
+            with self.subTest(invoice_id=invoice_id):
+                self.assert_bad_request(
+                    params={"invoice_ids": f"a-1,{invoice_id}", "file_format": "xml"}
+                )
+
+    def test_batch_size_limit(self) -> None:
+        """Tests main accepting MAX_BATCH_SIZE invoice ids and rejecting one more with 400 status code."""
+        invoice_ids = [f"id-{number}" for number in range(read_params.MAX_BATCH_SIZE)]
+
+        actual_outcome = read_params.main(
+            req=make_request(
+                params={"invoice_ids": ",".join(invoice_ids), "file_format": "xml"}
+            )
+        )
+
+        self.assertEqual(first=actual_outcome["invoice_ids"], second=invoice_ids)
+        self.assert_bad_request(
+            params={
+                "invoice_ids": ",".join(invoice_ids + ["id-x"]),
+                "file_format": "xml",
+            }
+        )
+
+
+class TestGetXmlBytesBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    @patch("modules.download_blob.modules.download_xml.get_xml_bytes")
+    def test_returning_invoices_in_order_of_ids(self, get_xml_bytes) -> None:
+        """Tests the function returning every invoice, keyed by id, in order of invoice_ids."""
+        get_xml_bytes.side_effect = lambda invoice_id, **_: f"<{invoice_id}/>".encode()
+        invoice_ids = ["c", "a", "b"]
+
+        actual_outcome = download_xml.get_xml_bytes_batch(
+            container_client=MagicMock(), invoice_ids=invoice_ids
+        )
+
+        self.assertEqual(first=list(actual_outcome), second=invoice_ids)
+        self.assertEqual(first=actual_outcome["a"], second=b"<a/>")
+
+    @patch("modules.download_blob.modules.download_xml.get_xml_bytes")
+    def test_raising_error_of_failed_download(self, get_xml_bytes) -> None:
+        """Tests the function raising DownloadBlobError if any of the downloads failed."""
+        get_xml_bytes.side_effect = DownloadBlobError(
+            exception_type="ResourceNotFoundError",
+            details="mock details",
+            message="mock message",
+            status_code=http_client.NOT_FOUND,
+        )
+
+        with self.assertRaises(expected_exception=DownloadBlobError):
+            download_xml.get_xml_bytes_batch(
+                container_client=MagicMock(), invoice_ids=["a", "b"]
+            )
+
+
+class TestCreateZip(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def test_packing_files(self) -> None:
+        """Tests the function packing every file under its name."""
+        files = {"a.xml": b"<a/>", "b.xml": b"<b/>"}
+
+        zip_bytes = create_zip.main(files=files)
+
+        with zipfile.ZipFile(file=io.BytesIO(zip_bytes)) as archive:
+            self.assertEqual(first=archive.namelist(), second=list(files))
+            self.assertEqual(first=archive.read(name="b.xml"), second=b"<b/>")
+
+
+class TestMain(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def call_main(self, params: dict[str, str]) -> tuple[bytes, int]:
+        """Calls download_blob.main with request carrying given query parameters."""
+        return download_blob.main(
+            req=make_request(params=params),
+            blob_container_client=MagicMock(),
+            exception_handler=handle_cosmosdb_error,
+            xslt_transformer=MagicMock(),
+        )
+
+    @patch("modules.download_blob.modules.download_xml.get_xml_bytes_batch")
+    def test_returning_zip_of_batch(self, get_xml_bytes_batch) -> None:
+        """Tests main returning zip archive with one xml file per invoice of batch request."""
+        get_xml_bytes_batch.return_value = {"a-1": b"<a/>", "b-2": b"<b/>"}
+
+        body, status_code = self.call_main(
+            params={"invoice_ids": "a-1,b-2", "file_format": "xml"}
+        )
+
+        self.assertEqual(first=status_code, second=http_client.OK)
+        with zipfile.ZipFile(file=io.BytesIO(body)) as archive:
+            self.assertEqual(first=archive.namelist(), second=["a-1.xml", "b-2.xml"])
+
+    @patch("modules.download_blob.modules.download_xml.get_xml_bytes_batch")
+    def test_returning_json_error_of_batch(self, get_xml_bytes_batch) -> None:
+        """Tests main returning JSON error details, if download of batch failed."""
+        get_xml_bytes_batch.side_effect = DownloadBlobError(
+            exception_type="ResourceNotFoundError",
+            details="mock details",
+            message="mock message",
+            status_code=http_client.NOT_FOUND,
+        )
+
+        body, status_code = self.call_main(
+            params={"invoice_ids": "a-1,b-2", "file_format": "xml"}
+        )
+
+        self.assertEqual(first=status_code, second=http_client.NOT_FOUND)
+        self.assertEqual(
+            first=orjson.loads(body)["exception"], second="ResourceNotFoundError"
+        )
+
+
+class TestGetContentType(unittest.TestCase):
+    # (query parameters, status code returned by main, expected Content-Type)
+    CASES = (
+        (
+            {"invoice_ids": "a-1,b-2", "file_format": "xml"},
+            http_client.OK,
+            "application/zip",
+        ),
+        (
+            {"invoice_id": "a-1", "file_format": "pdf"},
+            http_client.OK,
+            "application/pdf",
+        ),
+        (
+            {"invoice_id": "a-1", "file_format": "xml"},
+            http_client.OK,
+            "application/xml",
+        ),
+        (
+            {"invoice_ids": "a-1,b-2", "file_format": "xml"},
+            http_client.BAD_REQUEST,
+            "application/json",
+        ),
+        (
+            {"invoice_id": "a-1", "file_format": "pdf"},
+            http_client.INTERNAL_SERVER_ERROR,
+            "application/json",
+        ),
+    )
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def test_content_type_follows_result(self) -> None:
+        """Tests the function labelling files by their format and every error body as JSON."""
+        for params, status_code, expected_outcome in self.CASES:
+            with self.subTest(params=params, status_code=status_code):
+                actual_outcome = download_blob.get_content_type(
+                    req=make_request(params=params), status_code=status_code
+                )
+
+                self.assertEqual(first=actual_outcome, second=expected_outcome)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,24 +1,34 @@
 import http.client as http_client
+from typing import Final
 import unittest
-from unittest.mock import patch
 
 import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
 
-from modules.utilities.exception_handler import handle_exception, QueryCosmosDBError
+from modules.query_cosmosdb.modules.custom_error import QueryCosmosDBError
+from utilities.exception_handler import handle_cosmosdb_error
 
 # turn off logs for testing
-context.turn_off_logging(module="modules.utilities.exception_handler")
+context.turn_off_logging(module="utilities.exception_handler")
+
+# expected handle_cosmosdb_error() results, built once at import
+_VALID_JSON: Final[bytes] = (
+    b'{"exception":"ValueError","message":"Invalid input","status_code":400,"details":"Details"}'
+)
+_MISSING_JSON: Final[bytes] = (
+    b'{"exception":"QueryCosmosDBError","message":"Unhandled exception. Please contact system administrator.","status_code":500,"details":null}'
+)
+_VALID_EXPECTED: Final = (_VALID_JSON, http_client.BAD_REQUEST)
+_MISSING_EXPECTED: Final = (_MISSING_JSON, http_client.INTERNAL_SERVER_ERROR)
 
 
 class TestHandleException(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {__name__}.{cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {__name__}.{cls.__name__} ###")
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {__name__}.{cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {__name__}.{cls.__name__} ###\n")
 
     def test_valid_input(self) -> None:
         """Test the function with valid input."""
@@ -27,10 +37,6 @@ class TestHandleException(unittest.TestCase):
         exc_message = "Invalid input"
         exc_details = "Details"
         exc_status_code = http_client.BAD_REQUEST
-        expected_result = (
-            '{\n    "exception": "ValueError",\n    "message": "Invalid input",\n    "status_code": 400,\n    "details": "Details"\n}',
-            http_client.BAD_REQUEST,
-        )
 
         exc_to_test = QueryCosmosDBError(
             exception_type=exc_name,
@@ -38,9 +44,9 @@ class TestHandleException(unittest.TestCase):
             message=exc_message,
             status_code=exc_status_code,
         )
-        test_result = handle_exception(exc=exc_to_test)
+        test_result = handle_cosmosdb_error(exc=exc_to_test)
 
-        self.assertEqual(first=expected_result, second=test_result)
+        self.assertEqual(first=_VALID_EXPECTED, second=test_result)
 
     def test_missing_fields(self) -> None:
         """Test the function with missing fields in the input by removing one of attributes."""
@@ -49,10 +55,6 @@ class TestHandleException(unittest.TestCase):
         exc_message = "Unhandled exception."
         exc_details = "Unhandled exception."
         exc_status_code = http_client.INTERNAL_SERVER_ERROR
-        expected_result = (
-            '{\n    "exception": "QueryCosmosDBError",\n    "message": "Unhandled exception. Please contact system administrator.",\n    "status_code": "HTTPStatus.INTERNAL_SERVER_ERROR",\n    "details": "None"\n}',
-            http_client.INTERNAL_SERVER_ERROR,
-        )
 
         exc_to_test = QueryCosmosDBError(
             exception_type=exc_name,
@@ -62,9 +64,9 @@ class TestHandleException(unittest.TestCase):
         )
         exc_to_test.__delattr__("status_code")
 
-        test_result = handle_exception(exc=exc_to_test)
+        test_result = handle_cosmosdb_error(exc=exc_to_test)
 
-        self.assertEqual(first=expected_result, second=test_result)
+        self.assertEqual(first=_MISSING_EXPECTED, second=test_result)
 
 
 if __name__ == "__main__":
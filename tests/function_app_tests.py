@@ -1,169 +1,202 @@
+import asyncio
 import http.client as http_client
-import json
+from types import MappingProxyType
+from typing import Mapping
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import azure.functions as func
-from azure.cosmos import ContainerProxy
+import orjson
 
 import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
 import function_app
+from modules.query_cosmosdb.modules.custom_error import QueryCosmosDBError
 
 # turn off logs for testing
 context.turn_off_logging(module="function_app")
 
+# read-only, so that no test can alter headers shared by request and expected responses
+_HEADERS = MappingProxyType({"Content-Type": "application/json"})
+
 
 class TestFunctionApp(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+        # function_app reads environment variables (mocked in context.py) through utilities.setup, checked once per
+        # class; if any of them differs, every test of the class errors out
+        environ = context.os.environ
+        setup = function_app.setup
+        assert setup.COSMOSDB_CONNECTION_STRING == environ["COSMOSDB_CONNECTION_STRING"]
+        assert setup.COSMOSDB_DATABASE_ID == environ["COSMOSDB_DATABASE_ID"]
+        assert setup.COSMOSDB_CONTAINER_ID == environ["COSMOSDB_CONTAINER_ID"]
         cls.maxDiff = None
         cls.request_url: str = "mock_url"
         cls.request_method: str = "POST"
-        cls.request_body_string: str = "SELECT * FROM c"
-        cls.request_headers: dict[str, str] = {"Content-Type": "application/json"}
+        cls.request_body: bytes = orjson.dumps({"query": "SELECT * FROM c"})
+        cls.request_headers: Mapping[str, str] = _HEADERS
         cls.request = func.HttpRequest(
             method=cls.request_method,
             url=cls.request_url,
             headers=cls.request_headers,
-            body=cls.request_body_string.encode(encoding="utf-8"),
+            body=cls.request_body,
+        )
+        # building the function walks app's decorator graph, so it is done once per class;
+        # staticmethod keeps the plain function from being bound to the test case
+        cls.func_call = staticmethod(
+            function_app.querycosmosdb_app.build().get_user_function()
         )
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
-    def test_function_app_getting_environmental_variables(self) -> None:
-        """Tests function_app getting environmental variables.
-        For unit testing, environmental variables are mocked in context.py."""
-        mock_connection_string = context.os.environ["AZURE_COSMOSDB_CONNECTION_STRING"]
-        mock_database_id = context.os.environ["DATABASE_ID"]
-        mock_container_id = context.os.environ["CONTAINER_ID"]
+    def call_app(self) -> func.HttpResponse:
+        """Awaits querycosmosdb_app coroutine with test request."""
+        return asyncio.run(self.func_call(self.request))
 
-        self.assertEqual(
-            first=function_app.CONNECTION_STRING, second=mock_connection_string
-        )
-        self.assertEqual(first=function_app.DATABASE_ID, second=mock_database_id)
-        self.assertEqual(first=function_app.CONTAINER_ID, second=mock_container_id)
-
-    @patch("function_app.get_query_from_body")
-    @patch("function_app.setup_cosmosdb_connection")
-    @patch("function_app.query_cosmosDB")
-    def test_with_valid_input(
-        self, query_cosmosDB, setup_cosmosdb_connection, get_query_from_body
+    def assert_response(
+        self, response: func.HttpResponse, body: bytes, status_code: int
     ) -> None:
-        """Tests function_app with valid input."""
-        mock_query_body: str = "mock_query_body"
+        """Asserts body, status code and headers of HTTP response returned by function_app."""
+        self.assertEqual(first=response.get_body(), second=body)
+        self.assertEqual(first=response.status_code, second=status_code)
+        self.assertEqual(first=dict(response.headers), second=self.request_headers)
+
+    @patch("function_app.query_cosmosdb.main")
+    def test_with_valid_input(self, query_cosmosdb_main) -> None:
+        """Tests function_app with valid input. Body and status code of query_cosmosdb.main are returned unchanged."""
+        mock_query_body: bytes = b'{"mock_id":{"id":"mock_id"}}'
         mock_response_status_code: int = http_client.OK
-        get_query_from_body.return_value = self.request_body_string
-        setup_cosmosdb_connection.return_value = MagicMock(spec=ContainerProxy)
-        query_cosmosDB.return_value = (
-            mock_query_body,
-            mock_response_status_code,
-        )
+        query_cosmosdb_main.return_value = (mock_query_body, mock_response_status_code)
 
-        expected_response = func.HttpResponse(
+        actual_response = self.call_app()
+
+        self.assert_response(
+            response=actual_response,
             body=mock_query_body,
             status_code=mock_response_status_code,
-            headers=self.request_headers,
         )
-
-        func_call = function_app.main.build().get_user_function()
-        actual_response = func_call(self.request)
-
+        query_cosmosdb_main.assert_called_once()
+        call_kwargs = query_cosmosdb_main.call_args.kwargs
+        self.assertIs(call_kwargs["req"], self.request)
         self.assertEqual(
-            first=actual_response.__dict__, second=expected_response.__dict__
+            first=call_kwargs["cosmosdb_container_id"],
+            second=function_app.setup.COSMOSDB_CONTAINER_ID,
+        )
+        self.assertIs(
+            call_kwargs["exception_handler"],
+            function_app.exception_handler.handle_cosmosdb_error,
         )
 
-    @patch("function_app.get_query_from_body")
-    @patch("function_app.setup_cosmosdb_connection")
-    @patch("function_app.query_cosmosDB")
-    def test_with_QueryCosmosDBError(
-        self, query_cosmosDB, setup_cosmosdb_connection, get_query_from_body
-    ) -> None:
-        """Tests function_app with QueryCosmosDBError exception raised by one of the functions called inside main.
-        QueryCosmosDBError should be handled by exception_handler, and thus the app should return http response with
-        status code and body from QueryCosmosDBError.
-        QueryCosmosDBError is raised by query_cosmosDB function."""
+    @patch("modules.query_cosmosdb.modules.connection_setup.main")
+    def test_with_QueryCosmosDBError(self, connection_setup_main) -> None:
+        """Tests function_app with QueryCosmosDBError exception raised by one of the functions called inside\
+        query_cosmosdb.main. QueryCosmosDBError should be handled by exception_handler, and thus the app should\
+        return http response with status code and body from QueryCosmosDBError.
+        QueryCosmosDBError is raised by connection_setup.main function."""
         exception_type: str = "mock exception type"
         message: str = "mock error message"
         status_code: int = http_client.NOT_FOUND
         details: str = "mock details"
 
-        expected_query_body: bytes = json.dumps(
-            obj={
+        expected_query_body: bytes = orjson.dumps(
+            {
                 "exception": exception_type,
                 "message": message,
                 "status_code": status_code,
                 "details": details,
-            },
-            indent=4,
-            sort_keys=False,
-            ensure_ascii=False,
-        ).encode(encoding="utf-8")
-
-        get_query_from_body.return_value = self.request_body_string
-        setup_cosmosdb_connection.return_value = MagicMock(spec=ContainerProxy)
-        query_cosmosDB.side_effect = function_app.QueryCosmosDBError(
+            }
+        )
+
+        connection_setup_main.side_effect = QueryCosmosDBError(
             exception_type=exception_type,
             message=message,
             status_code=status_code,
             details=details,
         )
 
-        req = self.request
+        actual_response = self.call_app()
 
-        expected_response = func.HttpResponse(
+        self.assert_response(
+            response=actual_response,
             body=expected_query_body,
             status_code=status_code,
-            headers=self.request_headers,
         )
 
-        func_call = function_app.main.build().get_user_function()
-        actual_response = func_call(req)
-
-        self.assertEqual(
-            first=actual_response.__dict__, second=expected_response.__dict__
-        )
-
-    @patch("function_app.get_query_from_body")
-    @patch("function_app.setup_cosmosdb_connection")
-    @patch("function_app.query_cosmosDB")
-    def test_with_unknown_Exception(
-        self, query_cosmosDB, setup_cosmosdb_connection, get_query_from_body
-    ) -> None:
+    @patch("modules.query_cosmosdb.modules.connection_setup.main")
+    def test_with_unknown_Exception(self, connection_setup_main) -> None:
         """
-        Tests function_app with an exception other than QueryCosmosDBError raised by one of the functions called inside main.
-        Exceptions other than QueryCosmosDBError are not handled by exception_handler, and thus the app should return http response with http_client.INTERNAL_SERVER_ERROR as status code and Exceptions message as body.
-        Exception ValueError("mock exception") is raised by query_cosmosDB function."""
+        Tests function_app with an exception other than QueryCosmosDBError raised by one of the functions called\
+        inside query_cosmosdb.main. Exceptions other than QueryCosmosDBError are not handled by exception_handler,\
+        and thus the app should return http response with http_client.INTERNAL_SERVER_ERROR as status code and\
+        exception's type and message as body.
+        Exception ValueError("mock exception") is raised by connection_setup.main function."""
         test_exception = ValueError("mock exception")
         test_exception_type = test_exception.__class__.__name__
 
-        expected_query_body = str(
-            object={
+        expected_query_body = orjson.dumps(
+            {
                 "exception": test_exception_type,
-                "message": test_exception,
+                "message": str(test_exception),
             }
-        ).encode(encoding="utf-8")
+        )
 
         mock_response_status_code: int = http_client.INTERNAL_SERVER_ERROR
-        get_query_from_body.return_value = self.request_body_string
-        setup_cosmosdb_connection.return_value = MagicMock(spec=ContainerProxy)
-        query_cosmosDB.side_effect = test_exception
+        connection_setup_main.side_effect = test_exception
 
-        req = self.request
+        actual_response = self.call_app()
 
-        expected_response = func.HttpResponse(
+        self.assert_response(
+            response=actual_response,
             body=expected_query_body,
             status_code=mock_response_status_code,
-            headers=self.request_headers,
-        ).__dict__
+        )
+
+
+class TestDownloadBlobApp(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+        # staticmethod keeps the plain function from being bound to the test case
+        cls.func_call = staticmethod(
+            function_app.downloadblob_app.build().get_user_function()
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def call_app(self, params: dict[str, str]) -> func.HttpResponse:
+        """Awaits downloadblob_app coroutine with GET request carrying given query parameters."""
+        req = func.HttpRequest(method="GET", url="mock_url", body=b"", params=params)
+        return asyncio.run(self.func_call(req))
 
-        func_call = function_app.main.build().get_user_function()
-        actual_response = func_call(req)
+    @patch("modules.download_blob.modules.download_xml.get_xml_bytes_batch")
+    def test_batch_labelled_as_zip(self, get_xml_bytes_batch) -> None:
+        """Tests zip archive of batch download returned with application/zip Content-Type."""
+        get_xml_bytes_batch.return_value = {"a-1": b"<a/>"}
 
-        self.assertEqual(first=actual_response.__dict__, second=expected_response)
+        response = self.call_app(params={"invoice_ids": "a-1", "file_format": "xml"})
+
+        self.assertEqual(first=response.status_code, second=http_client.OK)
+        self.assertEqual(
+            first=response.headers["Content-Type"], second="application/zip"
+        )
+
+    def test_batch_error_labelled_as_json(self) -> None:
+        """Tests error details of batch download (too many invoice ids) returned with application/json Content-Type."""
+        invoice_ids = ",".join(f"id-{number}" for number in range(100))
+
+        response = self.call_app(
+            params={"invoice_ids": invoice_ids, "file_format": "xml"}
+        )
+
+        self.assertEqual(first=response.status_code, second=http_client.BAD_REQUEST)
+        self.assertEqual(
+            first=response.headers["Content-Type"], second="application/json"
+        )
+        orjson.loads(response.get_body())
 
 
 if __name__ == "__main__":
@@ -3,33 +3,35 @@ import unittest
 from azure.functions import HttpRequest
 
 import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
-from modules.get_query_from_body import (
+from modules.query_cosmosdb.modules.get_query_from_body import (
     get_json_from_payload,
     get_query_from_payload,
     main,
 )
-from modules.utilities.query_cosmosDB_error import QueryCosmosDBError
+from modules.query_cosmosdb.modules.custom_error import QueryCosmosDBError
 
 # turn off logs for testing
-context.turn_off_logging(module="modules.get_query_from_body")
+context.turn_off_logging(module="modules.query_cosmosdb.modules.get_query_from_body")
+
+# requests shared by tests, built once at import
+_VALID_REQ = HttpRequest(method="POST", body=b'{"query": "SELECT * FROM c"}', url="url")
+_EMPTY_REQ = HttpRequest(method="POST", body=b"", url="url")
 
 
 class TestGetJSONFromPayload(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
 
     @classmethod
     def tearDownClass(cls) -> None:
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
     def test_valid_input_returns_dict(self) -> None:
         """Test getting a valid request body"""
 
-        body = b'{"query": "SELECT * FROM c"}'
-        test_input = HttpRequest(method="POST", body=body, url="url")
         expected_result = {"query": "SELECT * FROM c"}
-        test_result = get_json_from_payload(payload=test_input)
+        test_result = get_json_from_payload(payload=_VALID_REQ)
 
         self.assertIsInstance(obj=test_result, cls=dict)
         self.assertEqual(first=test_result, second=expected_result)
@@ -37,20 +39,18 @@ class TestGetJSONFromPayload(unittest.TestCase):
     def test_invalid_input_raises_custom_exception(self) -> None:
         """Test getting an invalid request body"""
 
-        test_input = HttpRequest(method="POST", body=b"", url="url")
-
         with self.assertRaises(expected_exception=QueryCosmosDBError):
-            get_json_from_payload(payload=test_input)
+            get_json_from_payload(payload=_EMPTY_REQ)
 
 
 class TestGetQueryFromPayload(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
 
     @classmethod
     def tearDownClass(cls) -> None:
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
     def test_valid_input_returns_string(self) -> None:
         """Test decoding a valid request body."""
@@ -74,19 +74,17 @@ class TestGetQueryFromPayload(unittest.TestCase):
 class TestMain(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
 
     @classmethod
     def tearDownClass(cls) -> None:
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
     def test_valid_input_returns_string(self) -> None:
         """Test getting a valid SQL query from a request body."""
 
-        body = b'{"query": "SELECT * FROM c"}'
-        test_input = HttpRequest(method="POST", body=body, url="url")
         expected_query = "SELECT * FROM c"
-        test_result = main(req=test_input)
+        test_result = main(req=_VALID_REQ)
 
         self.assertIsInstance(obj=test_result, cls=str)
         self.assertEqual(first=test_result, second=expected_query)
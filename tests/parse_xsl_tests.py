@@ -0,0 +1,63 @@
+import unittest
+
+from lxml import etree
+
+import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
+from utilities import parse_xsl
+
+# turn off logs for testing
+context.turn_off_logging(module="utilities.parse_xsl")
+
+# ".invalid" top-level domain never resolves (RFC 2606)
+REMOTE_IMPORT_XSL = b"""<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+    <xsl:import href="http://crd.gov.invalid/common.xsl"/>
+    <xsl:template match="/"><r/></xsl:template>
+</xsl:stylesheet>"""
+REMOTE_DOCUMENT_XSL = b"""<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+    <xsl:template match="/"><r><xsl:value-of select="count(document('http://crd.gov.invalid/k.xsd'))"/></r></xsl:template>
+</xsl:stylesheet>"""
+LOCAL_XSL = b"""<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+    <xsl:template match="/"><r><xsl:value-of select="a"/></r></xsl:template>
+</xsl:stylesheet>"""
+
+
+class TestTransformStylXlsToXLST(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def setUp(self) -> None:
+        parse_xsl.clear_xslt_cache()
+
+    def test_transforming_with_local_stylesheet(self) -> None:
+        """Tests the function compiling stylesheet without remote references, and its XSLT object transforming xml."""
+        xsl_transform = parse_xsl.transform_styl_xls_to_XLST(xsl_bytes=LOCAL_XSL)
+
+        actual_outcome = xsl_transform(etree.fromstring(b"<a>PL</a>"))
+
+        self.assertEqual(
+            first=str(actual_outcome).strip(), second='<?xml version="1.0"?>\n<r>PL</r>'
+        )
+
+    def test_rejecting_remote_import(self) -> None:
+        """Tests the function rejecting stylesheet with xsl:import of a remote URL."""
+        with self.assertRaises(expected_exception=etree.XSLTParseError):
+            parse_xsl.transform_styl_xls_to_XLST(xsl_bytes=REMOTE_IMPORT_XSL)
+
+    def test_denying_remote_document_read(self) -> None:
+        """Tests XSLT object denying document() read of a remote URL during transformation."""
+        xsl_transform = parse_xsl.transform_styl_xls_to_XLST(
+            xsl_bytes=REMOTE_DOCUMENT_XSL
+        )
+
+        with self.assertRaises(expected_exception=etree.XSLTApplyError) as cm:
+            xsl_transform(etree.fromstring(b"<a/>"))
+        self.assertIn(member="read rights", container=str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,31 +1,26 @@
-import json
 import unittest
-from unittest.mock import patch
+
+import orjson
 
 import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
-from modules.utilities.query_cosmosDB_error import QueryCosmosDBError
+from modules.query_cosmosdb.modules.custom_error import QueryCosmosDBError
 
 # turn off logs for testing
-context.turn_off_logging(module="modules.utilities.query_cosmosDB_error")
+context.turn_off_logging(module="modules.query_cosmosdb.modules.custom_error")
 
 
 class TestQueryCosmosDBError(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
         cls.mocked_exception_type = "test_exception"
         cls.mocked_details = "test_details"
         cls.mocked_message = "test_message"
         cls.mocked_status_code = 123
 
-        with patch("modules.utilities.query_cosmosDB_error.log").start() as mock_logger:
-            cls.mock_logger = mock_logger
-            cls.mock_logger.setLevel.return_value = None
-
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
     def test_correct_attributes_assignment(self) -> None:
         exception = QueryCosmosDBError(
@@ -57,11 +52,8 @@ class TestQueryCosmosDBError(unittest.TestCase):
             "status_code": self.mocked_status_code,
             "details": self.mocked_details,
         }
-        expected_response = json.dumps(
-            obj=expected_response_dict,
-            indent=4,
-            sort_keys=False,
-            ensure_ascii=False,
+        expected_response = orjson.dumps(expected_response_dict).decode(
+            encoding="utf-8"
         )
 
         self.assertEqual(first=actual_response, second=expected_response)
@@ -77,15 +69,12 @@ class TestQueryCosmosDBError(unittest.TestCase):
         expected_response_dict = {
             "exception": "ValueError",
             "message": "An error occurred",
-            "status_code": "400",
+            "status_code": 400,
             "details": "{1, 2, 3}",
         }
 
-        expected_response = json.dumps(
-            obj=expected_response_dict,
-            indent=4,
-            sort_keys=False,
-            ensure_ascii=False,
+        expected_response = orjson.dumps(expected_response_dict).decode(
+            encoding="utf-8"
         )
         actual_response = exception.error_response
 
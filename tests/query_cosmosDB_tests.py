@@ -1,32 +1,89 @@
 from collections.abc import Iterable
-import http.client as http_client
-from typing import Any
+import copy
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 import unittest
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, Mock
 
 from azure.cosmos import exceptions as cosmos_exc, ContainerProxy
+import cachetools
 
 import context  # noqa: F401 # context imported for mocking environment variables and inserting PATH
 
-from modules.query_cosmosDB import main, iterable_to_dict, dict_to_json, get_query_items
-from modules.utilities.query_cosmosDB_error import QueryCosmosDBError
+from modules.query_cosmosdb.modules.get_query_items import (
+    main,
+    extract_partition_key,
+    iterable_to_json,
+    get_query_items,
+)
+from modules.query_cosmosdb.modules.custom_error import QueryCosmosDBError
+from utilities.locked_cache import LockedCache
 
 # turn off logs for testing
-context.turn_off_logging(module="modules.query_cosmosDB")
+context.turn_off_logging(module="modules.query_cosmosdb.modules.get_query_items")
+
+# spec'd mock walks ContainerProxy once, at import. Copies keep the spec (unknown attributes still raise
+# AttributeError), but share child mocks, so every test starts from reset_mock() in setUp.
+_CONTAINER_PROTOTYPE = Mock(spec=ContainerProxy)
+
+
+class TestExtractPartitionKey(unittest.TestCase):
+    # SQL query: expected partition key (None means query runs cross-partition); partition key path is "/NIP"
+    CASES: Mapping[str, Optional[str | int]] = MappingProxyType(
+        {
+            "SELECT c.id FROM c WHERE c.NIP = '9999999999'": "9999999999",
+            'SELECT c.id FROM c WHERE c.NIP = "9999999999"': "9999999999",
+            "SELECT * FROM c WHERE c.NIP = 42 AND c.year = 2023": 42,
+            "SELECT * FROM c WHERE c.NIP = -42": -42,
+            "SELECT * FROM c WHERE (c.NIP = 'a') ORDER BY c.id": "a",
+            r"SELECT * FROM c WHERE c.NIP = 'a\'b'": None,
+            r'SELECT * FROM c WHERE c.NIP = "a\"b"': None,
+            "SELECT * FROM c WHERE c.NIP = 1.5": None,
+            "SELECT * FROM c WHERE c.NIP = 1e5": None,
+            "SELECT * FROM c WHERE c.NIP = 'a' OR c.NIP = 'b'": None,
+            "SELECT * FROM c WHERE c.year = 2023 OR c.NIP = 'a'": None,
+            "SELECT * FROM c WHERE c.NIP = 'a' AND c.NIP = 'b'": None,
+            "SELECT * FROM c WHERE c.NIP = 'a' || 'b'": None,
+            "SELECT * FROM c WHERE c.nip = 'a'": None,
+            "SELECT * FROM c WHERE c.NIP2 = 'a'": None,
+            "SELECT * FROM c WHERE c.NIP IN ('a', 'b')": None,
+            "SELECT * FROM c": None,
+        }
+    )
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def test_extracting_only_unambiguous_literals(self) -> None:
+        """Tests the function routing to a single partition only if partition key literal is parsed unambiguously."""
+        for sql_query, expected_outcome in self.CASES.items():
+            with self.subTest(sql_query=sql_query):
+                actual_outcome = extract_partition_key(
+                    sql_query=sql_query, partition_key_path="/NIP"
+                )
+
+                self.assertEqual(first=actual_outcome, second=expected_outcome)
 
 
 class TestGetQueryItems(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
-        cls.container_mock = Mock(spec=ContainerProxy)
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+        cls.container_mock = copy.copy(_CONTAINER_PROTOTYPE)
         cls.sql_query = "mock query"
         cls.expected_exception = QueryCosmosDBError
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def setUp(self) -> None:
+        self.container_mock.reset_mock(return_value=True, side_effect=True)
 
     def test_returning_valid_iterable(self) -> None:
         """Tests the function with valid input."""
@@ -80,33 +137,54 @@ class TestGetQueryItems(unittest.TestCase):
             get_query_items(container=self.container_mock, sql_query=self.sql_query)
 
 
-class TestIterableToDict(unittest.TestCase):
+class TestIterableToJson(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
 
-    def test_returning_dict(self) -> None:
+    def test_returning_json_bytes(self) -> None:
         """Tests the function with valid input."""
         test_input = iter(({"id": "1", "name": "item1"}, {"id": "2", "name": "item2"}))
 
-        expected_outcome = {
-            "1": {"id": "1", "name": "item1"},
-            "2": {"id": "2", "name": "item2"},
-        }
-        actual_outcome = iterable_to_dict(iterable=test_input)
+        expected_outcome = (
+            b'{"1":{"id":"1","name":"item1"},"2":{"id":"2","name":"item2"}}'
+        )
+        actual_outcome = iterable_to_json(iterable=test_input)
 
-        self.assertIsInstance(obj=actual_outcome, cls=dict)
+        self.assertIsInstance(obj=actual_outcome, cls=bytes)
         self.assertEqual(
             first=actual_outcome,
             second=expected_outcome,
         )
 
-    def test_raising_custom_exception(self) -> None:
+    def test_keeping_last_item_of_duplicate_id(self) -> None:
+        """Tests the function with items sharing an id: id is written once, at its first position, with last item."""
+        test_input = iter(
+            (
+                {"id": "1", "name": "first"},
+                {"id": "2", "name": "item2"},
+                {"id": "1", "name": "last"},
+            )
+        )
+
+        expected_outcome = (
+            b'{"1":{"id":"1","name":"last"},"2":{"id":"2","name":"item2"}}'
+        )
+        actual_outcome = iterable_to_json(iterable=test_input)
+
+        self.assertEqual(first=actual_outcome, second=expected_outcome)
+
+    def test_returning_empty_bytes(self) -> None:
+        """Tests the function with no query items."""
+        actual_outcome = iterable_to_json(iterable=iter(()))
+
+        self.assertEqual(first=actual_outcome, second=b"")
+
+    def test_raising_custom_exception_from_key_error(self) -> None:
         """Tests function raising custom exception when items in Iterable don't have 'id' field."""
         expected_exc = QueryCosmosDBError
         iterable = iter(
@@ -117,58 +195,30 @@ class TestIterableToDict(unittest.TestCase):
         )
 
         with self.assertRaises(expected_exception=expected_exc):
-            iterable_to_dict(iterable=iterable)
-
-
-class TestDictToJson(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
-
-    @classmethod
-    def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
-
-    def test_returniung_json_string(self) -> None:
-        """Tests the function with valid input."""
-        query_items_dict = {
-            "1": {"id": "1", "name": "item1"},
-            "2": {"id": "2", "name": "item2"},
-        }
-        expected_outcome = '{\n    "1": {\n        "id": "1",\n        "name": "item1"\n    },\n    "2": {\n        "id": "2",\n        "name": "item2"\n    }\n}'
-        actual_outcome = dict_to_json(query_items_dict=query_items_dict)
+            iterable_to_json(iterable=iterable)
 
-        self.assertIsInstance(obj=actual_outcome, cls=str)
-        self.assertEqual(
-            first=actual_outcome,
-            second=expected_outcome,
-        )
-
-    def test_raising_custom_exception(self) -> None:
-        """Tests function raising custom exception when any of either key or value of passed dictionary
-        can't be converted to json."""
+    def test_raising_custom_exception_from_encode_error(self) -> None:
+        """Tests function raising custom exception when any item can't be converted to json."""
         expected_exc = QueryCosmosDBError
-        query_items_dict = {
-            "1": set([1, 2, 3]),
-            "2": {"not_id": "2", "name": "item2"},
-        }
+        iterable = iter([{"id": "1", "name": set([1, 2, 3])}])
 
         with self.assertRaises(expected_exception=expected_exc):
-            dict_to_json(query_items_dict=query_items_dict)
+            iterable_to_json(iterable=iterable)
 
 
 class TestMain(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        print(f"\n### STARTING TEST: {cls.__name__} ###")
-        cls.container_mock = Mock(spec=ContainerProxy)
+        context.banner(msg=f"\n### STARTING TEST: {cls.__name__} ###")
+        cls.container_mock = copy.copy(_CONTAINER_PROTOTYPE)
         cls.sql_query = "mock query"
 
     @classmethod
     def tearDownClass(cls) -> None:
-        patch.stopall()
-        print(f"\n### FINISHED TEST: {cls.__name__} ###\n")
+        context.banner(msg=f"\n### FINISHED TEST: {cls.__name__} ###\n")
+
+    def setUp(self) -> None:
+        self.container_mock.reset_mock(return_value=True, side_effect=True)
 
     def test_with_valid_input(self) -> None:
         """Tests the main function with valid input."""
@@ -176,15 +226,12 @@ class TestMain(unittest.TestCase):
         self.container_mock.query_items.return_value = query_items_list
 
         expected_outcome = (
-            str(
-                '{\n    "1": {\n        "id": "1",\n        "name": "item1"\n    },\n    "2": {\n        "id": "2",\n        "name": "item2"\n    }\n}'
-            ),
-            http_client.OK,
+            b'{"1":{"id":"1","name":"item1"},"2":{"id":"2","name":"item2"}}'
         )
 
         actual_outcome = main(container=self.container_mock, sql_query=self.sql_query)
 
-        self.assertIsInstance(obj=actual_outcome, cls=tuple)
+        self.assertIsInstance(obj=actual_outcome, cls=bytes)
         self.assertEqual(first=actual_outcome, second=expected_outcome)
 
     def test_with_no_query_items_returned(self) -> None:
@@ -192,11 +239,120 @@ class TestMain(unittest.TestCase):
         query_items_list = []
         self.container_mock.query_items.return_value = query_items_list
 
-        expected_outcome = "Query returned no items.", http_client.OK
+        expected_outcome = b'{"message":"Query returned no items."}'
 
         actual_outcome = main(container=self.container_mock, sql_query=self.sql_query)
 
-        self.assertIsInstance(obj=actual_outcome, cls=tuple)
+        self.assertIsInstance(obj=actual_outcome, cls=bytes)
+        self.assertEqual(first=actual_outcome, second=expected_outcome)
+
+    def make_query_cache(self, maxsize: int = 1024) -> LockedCache:
+        """Builds query cache bounded by bytes, as function_app does, with a fake clock moved by self.now."""
+        self.now = 0.0
+        return LockedCache(
+            cache=cachetools.TTLCache(
+                maxsize=maxsize, ttl=30, timer=lambda: self.now, getsizeof=len
+            )
+        )
+
+    def test_with_query_cache_hit(self) -> None:
+        """Tests the main function serving repeated query from cache, without querying the container again."""
+        self.container_mock.id = "mock_container"
+        self.container_mock.query_items.return_value = [{"id": "1", "name": "item1"}]
+        query_cache = self.make_query_cache()
+
+        first_outcome = main(
+            container=self.container_mock,
+            sql_query=self.sql_query,
+            query_cache=query_cache,
+        )
+        second_outcome = main(
+            container=self.container_mock,
+            sql_query=f"  {self.sql_query} ",
+            query_cache=query_cache,
+        )
+
+        self.assertEqual(first=second_outcome, second=first_outcome)
+        self.container_mock.query_items.assert_called_once()
+
+    def test_with_query_cache_miss(self) -> None:
+        """Tests the main function querying the container for a query not found in cache."""
+        self.container_mock.id = "mock_container"
+        self.container_mock.query_items.return_value = [{"id": "1", "name": "item1"}]
+        query_cache = self.make_query_cache()
+
+        main(
+            container=self.container_mock, sql_query="query 1", query_cache=query_cache
+        )
+        main(
+            container=self.container_mock, sql_query="query 2", query_cache=query_cache
+        )
+
+        self.assertEqual(first=self.container_mock.query_items.call_count, second=2)
+        self.assertEqual(first=len(query_cache), second=2)
+
+    def test_with_query_cache_expired(self) -> None:
+        """Tests the main function querying the container again once cached result expired."""
+        self.container_mock.id = "mock_container"
+        self.container_mock.query_items.side_effect = [
+            [{"id": "1", "name": "old"}],
+            [{"id": "1", "name": "new"}],
+        ]
+        query_cache = self.make_query_cache()
+
+        main(
+            container=self.container_mock,
+            sql_query=self.sql_query,
+            query_cache=query_cache,
+        )
+        self.now += 31
+        actual_outcome = main(
+            container=self.container_mock,
+            sql_query=self.sql_query,
+            query_cache=query_cache,
+        )
+
+        self.assertEqual(first=actual_outcome, second=b'{"1":{"id":"1","name":"new"}}')
+        self.assertEqual(first=self.container_mock.query_items.call_count, second=2)
+
+    def test_with_query_result_larger_than_cache(self) -> None:
+        """Tests the main function returning result larger than cache's byte budget, without caching it."""
+        self.container_mock.id = "mock_container"
+        self.container_mock.query_items.return_value = [{"id": "1", "name": "item1"}]
+        query_cache = self.make_query_cache(maxsize=8)
+
+        actual_outcome = main(
+            container=self.container_mock,
+            sql_query=self.sql_query,
+            query_cache=query_cache,
+        )
+
+        self.assertEqual(
+            first=actual_outcome, second=b'{"1":{"id":"1","name":"item1"}}'
+        )
+        self.assertEqual(first=len(query_cache), second=0)
+
+    def test_with_page_size_returns_single_page(self) -> None:
+        """Tests the main function streaming a single page of query items, with continuation token."""
+        pages = MagicMock()
+        pages.__next__.return_value = iter([{"id": "1", "name": "item1"}])
+        pages.continuation_token = "mock_token"
+        query_items = MagicMock()
+        query_items.by_page.return_value = pages
+        self.container_mock.query_items.return_value = query_items
+
+        expected_outcome = (
+            b'{"items":{"1":{"id":"1","name":"item1"}},"continuation":"mock_token"}'
+        )
+
+        actual_outcome = main(
+            container=self.container_mock,
+            sql_query=self.sql_query,
+            page_size=1,
+            continuation_token="previous_token",
+        )
+
+        query_items.by_page.assert_called_once_with(continuation_token="previous_token")
         self.assertEqual(first=actual_outcome, second=expected_outcome)
 
 
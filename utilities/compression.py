@@ -0,0 +1,64 @@
+"""Compresses HTTP response bodies for clients accepting gzip Content-Encoding."""
+
+import gzip
+import logging
+
+import azure.functions as func
+
+log = logging.getLogger(name="log." + __name__)
+
+
+def accepts_gzip(req: func.HttpRequest) -> bool:
+    """
+    Checks whether client declared gzip in Accept-Encoding request header.
+
+    Parameters:
+        req (func.HttpRequest): HTTP request sent to Azure Function's endpoint.
+
+    Returns:
+        bool: True if response body may be gzip-compressed.
+    """
+    accept_encoding = req.headers.get("Accept-Encoding", "")
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*") and params.replace(" ", "") != "q=0":
+            return True
+    return False
+
+
+def gzip_body(
+    req: func.HttpRequest,
+    body: str | bytes,
+    headers: dict[str, str],
+    min_size: int = 1024,
+    compresslevel: int = 1,
+) -> str | bytes:
+    """
+    Compresses response body with gzip if client accepts it and body is big enough to benefit from it.
+    Sets Content-Encoding header accordingly.
+
+    Parameters:
+        req (func.HttpRequest): HTTP request sent to Azure Function's endpoint.
+        body (str | bytes): HTTP response body.
+        headers (dict[str, str]): HTTP response headers, updated in place.
+        min_size (int, optional): Bodies smaller than this (in bytes) are sent uncompressed. Defaults to 1024.
+        compresslevel (int, optional): gzip compression level. Level 1 is fastest, and JSON/XML still compress\
+            several times over. Defaults to 1.
+
+    Returns:
+        body (str | bytes): Compressed body (bytes), or unchanged body.
+    """
+    if len(body) < min_size or not accepts_gzip(req=req):
+        return body
+
+    if isinstance(body, str):
+        body = body.encode(encoding="utf-8")
+
+    compressed = gzip.compress(data=body, compresslevel=compresslevel)
+    headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    log.debug(
+        "Response body compressed from %s to %s bytes.", len(body), len(compressed)
+    )
+
+    return compressed
@@ -1,9 +1,11 @@
 """Collects error details from the exception info tuple."""
-import json
+
 import logging
 import http.client as http_client
 from typing import Protocol
 
+import orjson
+
 
 class CustomError(Protocol):  # pylint: disable=R0903 # intentional behaviour
     """Protocol for custom error classes."""
@@ -19,10 +21,22 @@ class CustomError(Protocol):  # pylint: disable=R0903 # intentional behaviour
 
 log = logging.getLogger(name="log." + __name__)
 
+# Fallback body differs only in exception type, so it is serialised once at import time as a template;
+# the quoted sentinel is replaced with the JSON-encoded class name of the unhandled exception
+UNHANDLED_EXCEPTION_SENTINEL: bytes = b'"__EXCEPTION_TYPE__"'
+UNHANDLED_ERROR_TEMPLATE: bytes = orjson.dumps(
+    {
+        "exception": "__EXCEPTION_TYPE__",
+        "message": "Unhandled exception. Please contact system administrator.",
+        "status_code": http_client.INTERNAL_SERVER_ERROR,
+        "details": None,
+    }
+)
+
 
 def handle_cosmosdb_error(
     exc: CustomError,
-) -> tuple[str, int]:
+) -> tuple[bytes, int]:
     """
     Handles QueryCosmosDBError exceptions in order to allow query_cosmosDB to pass detailed information on encountered\
     exception into HTTP response body.
@@ -32,7 +46,7 @@ def handle_cosmosdb_error(
             message (str), status_code (int).
 
     Returns:
-        error_response (str): JSON string representing a dictionary of QueryCosmosDBError's attributes\
+        error_response (bytes): UTF-8 encoded JSON representing a dictionary of QueryCosmosDBError's attributes\
         following the format:
             {
                 "exception": exception_type,
@@ -47,29 +61,23 @@ def handle_cosmosdb_error(
         error_response = exc.error_response
         status_code = exc.status_code
         log.error(
-            msg=f"Exception {exception_type} handled.\nReturned HTTP Response body: {error_response}"
+            "Exception %s handled.\nReturned HTTP Response body: %s",
+            exception_type,
+            error_response,
         )
 
-        return error_response, status_code
+        # bytes are handed to HttpResponse as they are, and written to the response stream in one go
+        return error_response.encode(encoding="utf-8"), status_code
     except Exception as exception:  # pylint: disable=W0718
         # If failed to find error_response or status_code in exc.
         # I can't imagine how this could happen, but just in case.
-        exception_type = exc.__class__.__name__
-        status_code = http_client.INTERNAL_SERVER_ERROR
-        message = "Unhandled exception. Please contact system administrator."
-        details = None
-
-        error_response_dict = {
-            "exception": str(object=exception_type),
-            "message": str(object=message),
-            "status_code": str(object=status_code),
-            "details": str(object=details),
-        }
-        error_response = json.dumps(
-            obj=error_response_dict, indent=4, sort_keys=False, ensure_ascii=False
-        )
-
         log.error(
-            msg=f"couldn't find error_response or status_code in exc. Exception: {exception}"
+            "couldn't find error_response or status_code in %s. Exception: %s",
+            type(exc).__name__,
+            exception,
+        )
+        # "exception" is the first key, so only its value is replaced, whatever the class name is
+        error_response = UNHANDLED_ERROR_TEMPLATE.replace(
+            UNHANDLED_EXCEPTION_SENTINEL, orjson.dumps(type(exc).__name__), 1
         )
-        return error_response, status_code
+        return error_response, http_client.INTERNAL_SERVER_ERROR
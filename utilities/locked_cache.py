@@ -0,0 +1,59 @@
+"""Thread-safe wrapper for in-memory caches shared by concurrent function invocations."""
+
+import logging
+import threading
+from typing import Any, Hashable, Iterator, MutableMapping
+
+log = logging.getLogger(name="log." + __name__)
+
+
+class LockedCache(MutableMapping):
+    """
+    Wraps a cache (e.g. cachetools.TTLCache), holding a lock for every operation. cachetools caches are not\
+    thread-safe, while function invocations run concurrently in worker threads. Values too large for a cache bounded\
+    by size (getsizeof) are not stored.
+
+    Parameters:
+        cache (MutableMapping): Cache to be wrapped.
+
+    Examples:
+        xml_cache = LockedCache(cache=cachetools.TTLCache(maxsize=32 * 1024 * 1024, ttl=300, getsizeof=len))
+        xml_bytes = xml_cache.get(key)  # use get() - item may expire between "in" check and lookup
+    """
+
+    def __init__(self, cache: MutableMapping) -> None:
+        self._cache = cache
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            return self._cache[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # cachetools raises ValueError for a value larger than the whole maxsize (size budget) of the cache;
+                # such value is simply not cached
+                log.debug("Value of %r too large to be cached.", key)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            del self._cache[key]
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def __iter__(self) -> Iterator:
+        with self._lock:
+            return iter(list(self._cache))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._cache.get(key, default)
@@ -1,28 +1,132 @@
 """Creates XSLT object needed to transform XML to PDF."""
+
+import functools
 import logging
+import os
+from typing import Optional
+
 from lxml import etree
 
 log = logging.getLogger(name="log." + __name__)
 
+XSL_NAMESPACE = "http://www.w3.org/1999/XSL/Transform"
+
+# network reads (document() of remote URLs) and all writes are denied during transformation
+ACCESS_CONTROL = etree.XSLTAccessControl(
+    read_network=False, write_network=False, write_file=False, create_dir=False
+)
 
-def transform_styl_xls_to_XLST(xsl_path: str) -> etree.XSLT:  # pylint: disable=C0103
+
+def add_strip_space(xsl_tree: etree._ElementTree) -> None:
     """
-    Transforms styl.xsl file into XSLT object.
+    Adds <xsl:strip-space elements="*"/> to stylesheet, so that whitespace-only text nodes of transformed\
+    xml are dropped, resulting in smaller output tree. Element is placed after xsl:import elements, as required\
+    by XSLT specification.
 
     Parameters:
-        xsl_path (str): Path to styl.xsl file.
+        xsl_tree (etree._ElementTree): Parsed stylesheet.
+    """
+    root = xsl_tree.getroot()
+    if root.find(path=f"{{{XSL_NAMESPACE}}}strip-space") is not None:
+        return
+
+    imports = root.findall(path=f"{{{XSL_NAMESPACE}}}import")
+    position = root.index(imports[-1]) + 1 if imports else 0
+    strip_space = etree.Element(f"{{{XSL_NAMESPACE}}}strip-space", elements="*")
+    root.insert(position, strip_space)
+
+
+# stylesheets are trusted local files: no DTD nor entity expansion, no xml:id index, no remote xsl:import
+XSL_PARSER = etree.XMLParser(
+    no_network=True,
+    remove_blank_text=True,
+    load_dtd=False,
+    resolve_entities=False,
+    huge_tree=False,
+    collect_ids=False,
+)
+
+
+def compile_xslt(xsl_tree: etree._ElementTree) -> etree.XSLT:
+    """
+    Compiles parsed stylesheet into XSLT object.
+
+    Parameters:
+        xsl_tree (etree._ElementTree): Parsed stylesheet.
 
     Returns:
-        xsl_transform (etree.XSLT): XSLT object.
+        xsl_transform (etree.XSLT): XSLT object. Denies network reads and writes during transformation.
     """
-    xsl_parser = etree.XMLParser(remove_blank_text=True)
-    xsl_tree = etree.parse(source=xsl_path, parser=xsl_parser)
+    add_strip_space(xsl_tree=xsl_tree)
     log.debug(msg="xsl_tree object created.")
-    xsl_transform = etree.XSLT(xslt_input=xsl_tree)
+    xsl_transform = etree.XSLT(xslt_input=xsl_tree, access_control=ACCESS_CONTROL)
     log.debug(msg="XSLT object created.")
     return xsl_transform
 
 
+@functools.lru_cache(maxsize=8)
+def build_xslt(xsl_path: str, mtime: float) -> etree.XSLT:  # pylint: disable=W0613
+    """
+    Parses and compiles stylesheet file. Cached by (xsl_path, mtime), so that stylesheet is compiled again only\
+    if file was modified.
+
+    Parameters:
+        xsl_path (str): Path to styl.xsl file.
+        mtime (float): Modification time of the file, part of cache key only.
+
+    Returns:
+        xsl_transform (etree.XSLT): XSLT object. Denies network reads and writes during transformation.
+    """
+    return compile_xslt(xsl_tree=etree.parse(source=xsl_path, parser=XSL_PARSER))
+
+
+@functools.lru_cache(maxsize=8)
+def build_xslt_from_bytes(xsl_bytes: bytes) -> etree.XSLT:
+    """
+    Parses and compiles stylesheet held in memory, straight from the buffer (no file I/O). Cached by content.
+
+    Parameters:
+        xsl_bytes (bytes): Content of styl.xsl file.
+
+    Returns:
+        xsl_transform (etree.XSLT): XSLT object. Denies network reads and writes during transformation.
+    """
+    xsl_root = etree.fromstring(xsl_bytes, parser=XSL_PARSER)
+    return compile_xslt(xsl_tree=xsl_root.getroottree())
+
+
+def transform_styl_xls_to_XLST(  # pylint: disable=C0103
+    xsl_path: Optional[str] = None, xsl_bytes: Optional[bytes] = None
+) -> etree.XSLT:
+    """
+    Transforms styl.xsl file (or its content) into XSLT object. Compiled objects are cached by (xsl_path, mtime)\
+    or by content, so repeated calls for an unchanged stylesheet return the same object. Callers holding the\
+    returned object (function_app compiles it once at import) keep using it even if the file changes later.
+
+    Parameters:
+        xsl_path (Optional[str], optional): Path to styl.xsl file. Defaults to None.
+        xsl_bytes (Optional[bytes], optional): Content of styl.xsl file, used instead of xsl_path if provided.\
+            Relative xsl:import hrefs can't be resolved without the path. Defaults to None.
+
+    Returns:
+        xsl_transform (etree.XSLT): XSLT object. Denies network reads and writes during transformation.
+
+    Raises:
+        ValueError: If neither xsl_path nor xsl_bytes is provided.
+    """
+    if xsl_bytes is not None:
+        return build_xslt_from_bytes(xsl_bytes=xsl_bytes)
+    if xsl_path is None:
+        raise ValueError("Either xsl_path or xsl_bytes must be provided.")
+    return build_xslt(xsl_path=xsl_path, mtime=os.stat(xsl_path).st_mtime)
+
+
+def clear_xslt_cache() -> None:
+    """Clears caches of compiled stylesheets, so that next call of transform_styl_xls_to_XLST() compiles again."""
+    build_xslt.cache_clear()
+    build_xslt_from_bytes.cache_clear()
+
+
 if __name__ == "__main__":
     transformer = transform_styl_xls_to_XLST(xsl_path="ksef_documents/styl.xsl")
     print(transformer.error_log)
@@ -1,27 +1,80 @@
 """Holds environmental variables, sets up custom logger."""
 
+import functools
 import logging
 import os
 
 log = logging.getLogger(name="log")
 
-# declare environment constants
-COSMOSDB_CONNECTION_STRING: str = os.environ["COSMOSDB_CONNECTION_STRING"]
-COSMOSDB_DATABASE_ID: str = os.environ["COSMOSDB_DATABASE_ID"]
-COSMOSDB_CONTAINER_ID: str = os.environ["COSMOSDB_CONTAINER_ID"]
-BLOB_SERVICE_CONNECTION_STRING: str = os.environ["BLOB_CONNECTION_STRING"]
-BLOB_CONTAINER_NAME: str = os.environ["BLOB_CONTAINER_NAME"]
+# environment constants read on first access, name of module attribute: name of environment variable
+REQUIRED_ENV: dict[str, str] = {
+    "COSMOSDB_CONNECTION_STRING": "COSMOSDB_CONNECTION_STRING",
+    "COSMOSDB_DATABASE_ID": "COSMOSDB_DATABASE_ID",
+    "COSMOSDB_CONTAINER_ID": "COSMOSDB_CONTAINER_ID",
+    "BLOB_SERVICE_CONNECTION_STRING": "BLOB_CONNECTION_STRING",
+    "BLOB_CONTAINER_NAME": "BLOB_CONTAINER_NAME",
+}
+
+# optional: container's partition key path, e.g. "/NIP"
+COSMOSDB_PARTITION_KEY: str | None = os.environ.get("COSMOSDB_PARTITION_KEY")
+# optional: consistency level of CosmosDB client, e.g. "Session" or "Eventual"; can only relax account's level.
+# Defaults to None (account's default consistency level).
+COSMOSDB_CONSISTENCY_LEVEL: str | None = os.environ.get("COSMOSDB_CONSISTENCY_LEVEL")
+# optional: time (in seconds) downloaded invoices are kept in memory, 0 turns caching off
+XML_CACHE_TTL: int = int(os.environ.get("XML_CACHE_TTL", "300"))
+# optional: time (in seconds) results of repeated CosmosDB queries are served from memory, 0 (default) turns caching
+# off. Cached results may be up to QUERY_CACHE_TTL seconds older than the container (a write is not seen by reads
+# served from cache), hence caching is opt-in.
+QUERY_CACHE_TTL: int = int(os.environ.get("QUERY_CACHE_TTL", "0"))
+# optional: size budget (in bytes) of each in-memory cache (invoices, ETags, pdfs, query results); caches count bytes
+# of cached bodies, not entries, so that a few large bodies can't exhaust worker's memory. Defaults to 32 MiB.
+CACHE_MAX_BYTES: int = int(os.environ.get("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def __getattr__(name: str) -> str:
+    """
+    Reads required environment variable on first access of module attribute (PEP 562) and memoizes it in module\
+    globals, so later lookups do not reach this hook.
+
+    Parameters:
+        name (str): name of module attribute, e.g. "COSMOSDB_CONNECTION_STRING".
+
+    Raises:
+        AttributeError: if name is not a declared environment constant.
+        KeyError: if environment variable is not set.
+
+    Returns:
+        str: value of environment variable.
+    """
+    if name not in REQUIRED_ENV:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = os.environ[REQUIRED_ENV[name]]
+    globals()[name] = value
+    return value
+
+
+LOGGING_FORMAT = "%(levelname)s, %(name)s.%(funcName)s: %(message)s"
+
+# single handler shared by every logger() call, so repeated setup does not create new handlers and formatters
+HANDLER = logging.StreamHandler(stream=None)
+
+
+@functools.lru_cache(maxsize=4)
+def get_formatter(logging_format: str) -> logging.Formatter:
+    """Returns logging.Formatter for logging_format, built once per format."""
+    return logging.Formatter(fmt=logging_format)
 
 
 def logger(
-    logging_format: str = "%(levelname)s, %(name)s.%(funcName)s: %(message)s",
+    logging_format: str = LOGGING_FORMAT,
     level: int = logging.INFO,
 ) -> None:
     """
-    Sets up custom logger.
+    Sets up custom logger. Idempotent: module level handler is attached once, formatter is built once per\
+    logging_format.
 
     Parameters:
-        format (str, optional): Logging format. Defaults to "%(name)s%(funcName)s: %(message)s".
+        format (str, optional): Logging format. Defaults to "%(levelname)s, %(name)s.%(funcName)s: %(message)s".
         level (int, optional): Logging level. Defaults to logging.INFO.
 
     Returns:
@@ -31,12 +84,7 @@ def logger(
 
     log.setLevel(level=level)
 
-    handler = logging.StreamHandler(stream=None)
-
-    formatter = logging.Formatter(fmt=logging_format)
-    handler.setFormatter(fmt=formatter)
-
-    if log.hasHandlers():
-        log.handlers.clear()
+    HANDLER.setFormatter(fmt=get_formatter(logging_format=logging_format))
 
-    log.addHandler(handler)
+    if log.handlers != [HANDLER]:
+        log.handlers[:] = [HANDLER]